@@ -0,0 +1,44 @@
+"""Per-row cost of add_reminder_to_db (one transaction per row) versus add_reminders_to_db.
+
+Both run against a fresh database in a temporary directory, with the same WAL settings the bot
+uses. Parsing is included for the bulk path, since /import parses the whole file first.
+
+Run from the repository root: python benchmarks/bench_import.py [rows...]
+"""
+import os, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+from reminder_io import parse_csv
+
+def fresh_db():
+    db.close_db()
+    db.DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+    db.init_db()
+
+def run(count):
+    deadline = time.time() + 30 * 86400
+    text = "description,deadline\n" + "".join(f"task {i},{int(deadline) + i * 60}\n" for i in range(count))
+
+    fresh_db()
+    start = time.perf_counter()
+    for i in range(count):
+        db.add_reminder_to_db(1, f"task {i}", deadline + i * 60)
+    single = time.perf_counter() - start
+
+    fresh_db()
+    start = time.perf_counter()
+    entries, _ = parse_csv(text)
+    rows = db.add_reminders_to_db(1, entries)
+    bulk = time.perf_counter() - start
+    assert len(rows) == count
+
+    print(f"{count:>7} rows  single: {single / count * 1e6:>8.1f} us/row  "
+          f"bulk: {bulk / count * 1e6:>7.1f} us/row  ({single / bulk:.1f}x)")
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000]
+    for count in counts:
+        run(count)
+    db.close_db()
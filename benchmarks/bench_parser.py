@@ -0,0 +1,33 @@
+"""Throughput of the deadline parser on a corpus of typical user inputs.
+
+Run from the repository root: python benchmarks/bench_parser.py [iterations]
+"""
+import os, sys, timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from deadline_parser import get_month_number, parse_deadline, parse_task
+
+DEADLINES = [
+    "15 April 14:30", "1 Jan 08:00", "30 sept 23:59", "12 Maret 17:00", "5 agustus 07.15",
+    "17 Agt 10:00", "25 desember 2027 00:00", "3 nopember 12:00", "besok 09:00", "lusa 18:30",
+    "hari ini 21:00", "tomorrow 06:45", "in 2 hours", "dalam 30 menit", "in 3 days",
+]
+TASKS = [
+    "Statistics 12 March 17:00", "Finish math homework 15 April 14:30",
+    "Chapter 3 review 15 april 2027 10:00", "call mom in 2 hours", "Laporan praktikum besok 09:00",
+]
+MONTHS = ["januari", "Feb", "septem", "agu", "okt", "December", "pebruari", "mei"]
+
+def bench(label, func, corpus, iterations):
+    seconds = timeit.timeit(lambda: [func(item) for item in corpus], number=iterations)
+    calls = iterations * len(corpus)
+    print(f"{label:<18} {calls / seconds:>12,.0f} calls/s  {seconds * 1e6 / calls:6.2f} us/call")
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    now = datetime(2026, 1, 1, 12, 0)
+    bench("get_month_number", get_month_number, MONTHS, iterations)
+    bench("parse_deadline", lambda text: parse_deadline(text, now), DEADLINES, iterations)
+    bench("parse_task", lambda text: parse_task(text, now), TASKS, iterations)
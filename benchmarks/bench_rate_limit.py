@@ -0,0 +1,129 @@
+"""Synthetic flood traffic against the per-user rate limit.
+
+limiter   Drives rate_limiter.UserRateLimiter on a simulated clock. Many ordinary users send
+          an update every few seconds while a few abusive ones send a hundred a second. Reports
+          cost per update and memory per bucket. Checks that ordinary users are never limited,
+          that abusers get no more than burst + rate * duration through, and that idle buckets
+          are evicted.
+bot       Starts bot.py against the fake Bot API from loadtest.py. One user sends a flood of
+          /setreminder commands while another sends a few. Counts the reminders stored and the
+          replies sent to each.
+
+The script exits with an error if a check fails.
+
+Run from the repository root: python benchmarks/bench_rate_limit.py [--users N] [--flood N]
+"""
+import argparse, asyncio, os, shutil, signal, sqlite3, subprocess, sys, tempfile, time, tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from rate_limiter import UserRateLimiter
+
+RATE, BURST = 0.5, 10  # the bot's defaults: 30 updates a minute, bursts of 10
+
+def check(condition, message):
+    if not condition:
+        raise SystemExit(f"FAILED: {message}")
+
+def flood_limiter(users, abusers, duration):
+    limiter = UserRateLimiter(RATE, BURST)
+    # Ordinary users send one update every 5 seconds, spread over the first 5 seconds
+    events = [(user * 5.0 / users + t, user) for user in range(users) for t in range(0, duration, 5)]
+    # Abusers send 100 updates a second
+    events += [(n / 100, -1 - abuser) for abuser in range(abusers) for n in range(duration * 100)]
+    events.sort()
+    admitted = {}
+    peak = 0  # buckets held at once
+    started = time.perf_counter()
+    for now, user_id in events:
+        if limiter.allow(user_id, now):
+            admitted[user_id] = admitted.get(user_id, 0) + 1
+        peak = max(peak, len(limiter))
+    elapsed = time.perf_counter() - started
+    # Memory is measured separately; tracing allocations would slow the timed loop down
+    sample = UserRateLimiter(RATE, BURST)
+    tracemalloc.start()
+    for user_id in range(10000):
+        sample.allow(user_id, 0.0)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    normal_allowed = sum(count for user_id, count in admitted.items() if user_id >= 0)
+    abuser_allowed = max((count for user_id, count in admitted.items() if user_id < 0), default=0)
+    abuser_cap = BURST + RATE * duration + 1
+    print(f"limiter: {len(events)} updates from {users} users and {abusers} abusers over {duration}s")
+    print(f"  {elapsed / len(events) * 1e6:.2f} us/update, peak {peak} buckets, "
+          f"{memory / len(sample):.0f} B/bucket")
+    print(f"  ordinary users: {normal_allowed}/{users * len(range(0, duration, 5))} allowed")
+    print(f"  each abuser: at most {abuser_allowed} of {duration * 100} allowed (cap {abuser_cap:.0f})")
+    check(normal_allowed == users * len(range(0, duration, 5)), "an ordinary user was limited")
+    check(abuser_allowed <= abuser_cap, "an abuser got past the limit")
+    limiter.allow(0, duration + limiter.idle + 1)
+    print(f"  after {limiter.idle:.0f}s idle: {len(limiter)} bucket left")
+    check(len(limiter) == 1, "idle buckets were not evicted")
+
+async def flood_bot(flood, timeout):
+    from loadtest import BOOTSTRAP, ROOT, TOKEN, FakeBotApi
+
+    api = FakeBotApi()
+    server = await asyncio.start_server(api.handle, "127.0.0.1", 0)
+    api_port = server.sockets[0].getsockname()[1]
+    replies = {}
+    api.reply = lambda chat_id, message: replies.__setitem__(chat_id, replies.get(chat_id, 0) + 1)
+
+    def send(chat_id, text):
+        api.push_update({"message": {
+            "message_id": api.next_message_id(),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": f"user{chat_id}"},
+            "text": text,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}],
+        }})
+
+    abuser, ordinary = 1, 2
+    for n in range(flood):
+        send(abuser, f"/setreminder spam {n} besok 09:00")
+    for n in range(3):
+        send(ordinary, f"/setreminder errand {n} besok 09:00")
+    workdir = tempfile.mkdtemp(prefix="bench-rate-limit-")
+    db_path = os.path.join(workdir, "reminders.db")
+    env = dict(os.environ, BOT_TOKEN=TOKEN, BOT_API_URL=f"http://127.0.0.1:{api_port}/bot", METRICS_PORT="0")
+    with open(os.path.join(workdir, "bot.log"), "wb") as log:
+        process = subprocess.Popen([sys.executable, "-c", BOOTSTRAP, db_path], cwd=ROOT, env=env,
+                                   stdout=log, stderr=subprocess.STDOUT)
+    try:
+        deadline = time.time() + timeout
+        while replies.get(ordinary, 0) < 3 and time.time() < deadline:
+            await asyncio.sleep(0.1)
+        await asyncio.sleep(1)  # let anything still queued come through
+    finally:
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        server.close()
+    stored = dict(sqlite3.connect(db_path).execute("SELECT user_id, COUNT(*) FROM reminders GROUP BY user_id"))
+    shutil.rmtree(workdir, ignore_errors=True)
+    print(f"bot: {flood} /setreminder from one user, 3 from another")
+    print(f"  flooding user: {stored.get(abuser, 0)} reminders stored, {replies.get(abuser, 0)} replies")
+    print(f"  other user:    {stored.get(ordinary, 0)} reminders stored, {replies.get(ordinary, 0)} replies")
+    check(stored.get(ordinary, 0) == 3, "the other user's reminders were not all stored")
+    # The burst is spent at once; a few more tokens may refill while the flood is read
+    check(stored.get(abuser, 0) <= BURST + 5, "the flood got past the limit")
+    check(replies.get(abuser, 0) <= stored.get(abuser, 0) + 1, "rejected updates were answered more than once")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100000, help="ordinary users for the limiter flood")
+    parser.add_argument("--abusers", type=int, default=100)
+    parser.add_argument("--duration", type=int, default=60, help="simulated seconds of the limiter flood")
+    parser.add_argument("--flood", type=int, default=500, help="/setreminder commands sent to bot.py")
+    parser.add_argument("--timeout", type=float, default=60)
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    flood_limiter(args.users, args.abusers, args.duration)
+    asyncio.run(flood_bot(args.flood, args.timeout))
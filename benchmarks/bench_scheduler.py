@@ -0,0 +1,46 @@
+"""Memory and scheduling cost of ReminderScheduler at 10k/100k/1M reminders.
+
+Run from the repository root: python benchmarks/bench_scheduler.py [counts...]
+"""
+import os, sys, time, tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import ReminderScheduler, REMINDER_INTERVALS
+
+async def _noop(context, batch):
+    pass
+
+def run(count):
+    scheduler = ReminderScheduler(_noop)
+    now = time.time()
+    # Deadlines spread over the next 30 days so every interval is still in the future
+    step = 30 * 86400 / count
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(count):
+        scheduler.schedule(i, i % 5000, i % 5000, f"task {i}", now + 6 * 86400 + i * step, now=now)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    fired = 0
+    horizon = now + 6 * 86400 + 30 * 86400
+    while True:
+        batch = scheduler.pop_due(horizon)
+        if not batch:
+            break
+        fired += len(batch)
+    drain = time.perf_counter() - start
+    print(
+        f"{count:>9} reminders | {len(REMINDER_INTERVALS) * count:>9} fires | "
+        f"schedule {elapsed * 1e6 / count:6.2f} us/reminder | "
+        f"memory {current / 2**20:8.1f} MiB ({current / count:6.0f} B/reminder) | "
+        f"dispatch {drain * 1e6 / fired:6.2f} us/fire"
+    )
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    for count in counts:
+        run(count)
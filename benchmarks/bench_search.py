@@ -0,0 +1,90 @@
+"""/cari through the FTS5 index versus scans.
+
+Fills a fresh database in a temporary directory with rows reminders spread over users, plus
+one heavy user holding 2% of them, then times, per query:
+
+  fts        the FTS5 path of db.search_reminders (one user)
+  scan-user  the scan path of db.search_reminders (one user's rows via idx_reminders_user,
+             matched by word prefix in Python)
+  like-all   a LIKE '%..%' scan of the whole table, as an unindexed search does
+
+db.search_reminders picks between the first two by the size of the user's list
+(SEARCH_SCAN_MAX_ROWS); both are forced here.
+
+Run from the repository root: python benchmarks/bench_search.py [rows] [users]
+"""
+import os, random, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+
+WORDS = (
+    "statistics calculus physics chemistry biology history essay report meeting dentist rent invoice "
+    "project deadline review exam quiz lab thesis draft slides client call gym groceries flight hotel "
+    "rapat tugas kuliah ujian laporan skripsi bayar listrik arisan kondangan belanja jadwal presentasi"
+).split()
+QUERIES = ("statistics", "stat", "rapat tugas", "thesis draft", "kondangan", "zzz")
+
+def fill(rows, users):
+    rng = random.Random(1)
+    deadline = int(time.time()) + 86400
+    conn = db.get_connection()
+    started = time.perf_counter()
+    batch = []
+    for i in range(rows):
+        desc = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 5))) + f" {i}"
+        batch.append((users if i % 50 == 0 else i % users, desc, deadline + i, None))
+        if len(batch) == 10000:
+            with conn:
+                conn.executemany(db.SQL_INSERT_REMINDER, batch)
+            batch = []
+    with conn:
+        conn.executemany(db.SQL_INSERT_REMINDER, batch)
+    return time.perf_counter() - started
+
+def like_all(query):
+    conn = db.get_connection()
+    terms = db.SEARCH_TERM_RE.findall(query.lower())
+    conditions = " AND ".join("description LIKE ?" for _ in terms)
+    return conn.execute(
+        f"SELECT COUNT(*) FROM reminders WHERE {conditions}", [f"%{term}%" for term in terms]
+    ).fetchone()
+
+def timed(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def run(rows, users):
+    db.close_db()
+    db.DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+    db.init_db()
+    if not db.FTS_AVAILABLE:
+        sys.exit("This sqlite build has no FTS5")
+    fill_seconds = fill(rows, users)
+    size = os.path.getsize(db.DB_PATH) + os.path.getsize(db.DB_PATH + "-wal")
+    print(f"{rows} reminders for {users} users, inserted in {fill_seconds:.1f}s (with index triggers), "
+          f"{size / 1024 / 1024:.0f} MiB on disk")
+    conn = db.get_connection()
+    for label, user_id in (("typical user", users // 2 + 1), ("heavy user", users)):
+        count = conn.execute("SELECT COUNT(*) FROM reminders WHERE user_id = ?", (user_id,)).fetchone()[0]
+        print(f"{label} ({count} reminders)")
+        for query in QUERIES:
+            db.SEARCH_SCAN_MAX_ROWS = 0
+            fts = timed(lambda: db.search_reminders(user_id, query), 10)
+            db.FTS_AVAILABLE = False
+            scan_user = timed(lambda: db.search_reminders(user_id, query), 10)
+            db.FTS_AVAILABLE = True
+            scan = timed(lambda: like_all(query), 2)
+            print(f"  {query!r:>15}  fts: {fts * 1e3:8.3f} ms  scan-user: {scan_user * 1e3:8.3f} ms  "
+                  f"like-all: {scan * 1e3:7.1f} ms")
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    run(rows, users)
+    db.close_db()
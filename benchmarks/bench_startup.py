@@ -0,0 +1,158 @@
+"""Cold start of bot.py: import time and time until the first update is handled.
+
+Three numbers are reported, each the median of several fresh processes:
+
+  import        seconds to `import bot` in a new interpreter
+  first reply   seconds from starting bot.py until its reply to a /lihatreminder sent before it
+                started arrives at a fake Bot API (the one in loadtest.py)
+  busy reply    the slowest reply to /lihatreminder commands sent one after another from the
+                first reply until the bot has rehydrated its reminders
+
+The database is filled with reminders whose five-day fire falls in the scheduler's horizon, so
+every start also rehydrates them. The report also shows when that finished. It is read from the
+"Loaded reminders" log line and is counted from the same start. Use --json to save a report and
+--compare to diff it against an earlier one.
+
+Run from the repository root: python benchmarks/bench_startup.py [--reminders N] [--runs N]
+"""
+import argparse, asyncio, json, os, re, shutil, signal, statistics, subprocess, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import db
+from loadtest import BOOTSTRAP, ROOT, TOKEN, FakeBotApi
+
+CHAT_ID = 1000
+IMPORT_SCRIPT = "import time; started = time.perf_counter(); import bot; print(time.perf_counter() - started)"
+LOADED_RE = re.compile(r"Loaded reminders .* reminders read")
+
+def import_time():
+    output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    return float(output.split()[-1])
+
+def fill(path, reminders):
+    db.close_db()
+    db.DB_PATH = path
+    db.init_db()
+    # Deadlines just over five days out, so each reminder's first fire is inside the horizon
+    # but none is due while the benchmark runs
+    start = int(time.time()) + 5 * 86400 + 600
+    conn = db.get_connection()
+    with conn:
+        conn.executemany(
+            db.SQL_INSERT_REMINDER,
+            ((CHAT_ID + i % 1000, f"reminder {i}", start + i * 5 * 3600 // max(reminders, 1), None)
+             for i in range(reminders)),
+        )
+    db.close_db()
+
+async def start_bot(workdir, timeout):
+    api = FakeBotApi()
+    server = await asyncio.start_server(api.handle, "127.0.0.1", 0)
+    api_port = server.sockets[0].getsockname()[1]
+
+    def send(text="/lihatreminder"):
+        reply = asyncio.get_running_loop().create_future()
+        api.waiting[CHAT_ID] = reply
+        api.push_update({"message": {
+            "message_id": api.next_message_id(),
+            "date": int(time.time()),
+            "chat": {"id": CHAT_ID, "type": "private"},
+            "from": {"id": CHAT_ID, "is_bot": False, "first_name": "startup"},
+            "text": text,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(text)}],
+        }})
+        return reply
+
+    reply = send()
+    env = dict(os.environ, BOT_TOKEN=TOKEN, BOT_API_URL=f"http://127.0.0.1:{api_port}/bot", METRICS_PORT="0")
+    log_path = os.path.join(workdir, "bot.log")
+    started = time.perf_counter()
+    with open(log_path, "wb") as log:
+        process = subprocess.Popen([sys.executable, "-c", BOOTSTRAP, os.path.join(workdir, "reminders.db")],
+                                   cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        await asyncio.wait_for(reply, timeout)
+        replied = time.perf_counter() - started
+        busy_reply, loaded = 0, None
+        while loaded is None and time.perf_counter() - started < timeout:
+            with open(log_path) as f:
+                if LOADED_RE.search(f.read()):
+                    loaded = time.perf_counter() - started
+                    break
+            sent = time.perf_counter()
+            await asyncio.wait_for(send(), timeout)
+            busy_reply = max(busy_reply, time.perf_counter() - sent)
+    except asyncio.TimeoutError:
+        raise SystemExit(f"bot.py did not reply within {timeout}s, see {log_path}")
+    finally:
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        server.close()
+    return replied, busy_reply, loaded
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="bench-startup-")
+    template = os.path.join(workdir, "template.db")
+    fill(template, args.reminders)
+    imports, replies, busy_replies, loads = [], [], [], []
+    try:
+        for _ in range(args.runs):
+            imports.append(import_time())
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(template + suffix):
+                    shutil.copy(template + suffix, os.path.join(workdir, "reminders.db" + suffix))
+            replied, busy_reply, loaded = asyncio.run(start_bot(workdir, args.timeout))
+            replies.append(replied)
+            busy_replies.append(busy_reply)
+            if loaded is not None:
+                loads.append(loaded)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "reminders": args.reminders,
+        "runs": args.runs,
+        "import_seconds": statistics.median(imports),
+        "first_reply_seconds": statistics.median(replies),
+        "busy_reply_seconds": statistics.median(busy_replies),
+        "rehydrated_seconds": statistics.median(loads) if loads else None,
+    }
+
+def print_report(report, baseline=None):
+    print(f"{report['reminders']} reminders, median of {report['runs']} starts")
+    for key, label in (("import_seconds", "import"), ("first_reply_seconds", "first reply"),
+                       ("busy_reply_seconds", "busy reply"), ("rehydrated_seconds", "rehydrated")):
+        value = report[key]
+        line = f"  {label:<12} {value:8.3f} s" if value is not None else f"  {label:<12}        -"
+        if baseline and baseline.get(key) and value is not None:
+            line += f"  ({(value - baseline[key]) / baseline[key] * 100:+.1f}% vs baseline)"
+        print(line)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reminders", type=int, default=100000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--json", help="save the report to this file")
+    parser.add_argument("--compare", help="a report saved with --json to compare against")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run(args)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Cost of building a reply inline (as the handlers used to) versus looking it up in templates.py.
+
+For the static /start and /help replies and a single reminder text, reports the time per reply and
+the number and size of the objects allocated for it, measured with tracemalloc.
+
+Run from the repository root: python benchmarks/bench_templates.py [iterations]
+"""
+import os, sys, timeit, tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from templates import TEXTS, KEYBOARDS, INDICATORS
+
+REMINDER = {"desc": "Statistics assignment", "deadline": "12-March 2027 17:00", "interval": "3 hours"}
+
+def inline_start():
+    help_text = (
+        "🔔 *Reminder Bot* 🔔\n\n"
+        "Welcome! This bot helps you set reminders for your important tasks.\n\n"
+        "⏰ Reminders will be sent: 5d, 3d, 1d, 12h, 6h, 3h, 1h, 30m, exactly at deadline."
+    )
+    keyboard = [
+        [InlineKeyboardButton("➕ Add Reminder", callback_data="add_reminder")],
+        [InlineKeyboardButton("📋 View Reminders", callback_data="list_reminder")]
+    ]
+    return help_text, InlineKeyboardMarkup(keyboard)
+
+def cached_start():
+    return TEXTS["en"]["welcome"], KEYBOARDS["en"]["start"]
+
+def inline_help():
+    help_text = (
+        "🔔 *Reminder Bot - Help* 🔔\n\n"
+        "*List of Commands:*\n"
+        "• /start - Start the bot\n"
+        "• /help - Show this guide\n"
+        "• /import - Add many reminders from a CSV/iCalendar file or a list\n"
+        "• /export - Download your reminders as CSV\n\n"
+        "Use the buttons below for quick navigation:"
+    )
+    keyboard = [
+        [InlineKeyboardButton("➕ Add Reminder", callback_data="add_reminder")],
+        [InlineKeyboardButton("📋 View Reminders", callback_data="list_reminder")],
+        [InlineKeyboardButton("🏠 Main Menu", callback_data="home")]
+    ]
+    return help_text, InlineKeyboardMarkup(keyboard)
+
+def cached_help():
+    return TEXTS["en"]["help"], KEYBOARDS["en"]["help"]
+
+def inline_reminder(data=REMINDER):
+    indicator = "Deadline reached" if data["interval"] == "Deadline" else f"{data['interval']} before the deadline"
+    return (
+        f"🔔 *REMINDER!*\n\n"
+        f"📝 *{data['desc']}*\n"
+        f"⏰ Deadline: {data['deadline']}\n"
+        f"⚠️ {indicator}"
+    )
+
+def cached_reminder(data=REMINDER):
+    return TEXTS["en"]["reminder"].format(
+        desc=data["desc"], deadline=data["deadline"], indicator=INDICATORS["en"][data["interval"]]
+    )
+
+def allocations(func, iterations):
+    # Keep every result alive so the objects a reply allocates are counted, not freed and reused
+    results = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(iterations):
+        results.append(func())
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    # The results list itself is the same in both runs; leave it out
+    return (blocks - 1) / iterations, (size - sys.getsizeof(results)) / iterations
+
+def run(name, inline, cached, iterations):
+    for label, func in (("inline", inline), ("cached", cached)):
+        seconds = min(timeit.repeat(func, number=iterations, repeat=3)) / iterations
+        blocks, size = allocations(func, iterations)
+        print(f"{name:<9} {label:<7} {seconds * 1e6:>8.2f} us/reply  {blocks:>6.1f} objects  {size:>8.0f} bytes")
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    run("start", inline_start, cached_start, iterations)
+    run("help", inline_help, cached_help, iterations)
+    run("reminder", inline_reminder, cached_reminder, iterations)
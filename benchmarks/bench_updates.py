@@ -0,0 +1,48 @@
+"""Throughput of PerUserUpdateProcessor as the worker limit grows.
+
+Each synthetic update runs a handler that waits 10 ms (standing in for database and Bot API
+round-trips). The script also checks that updates from one user finish in order.
+
+Run from the repository root: python benchmarks/bench_updates.py [users] [updates_per_user]
+"""
+import asyncio, os, sys, time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram import Chat, Message, Update, User
+from update_processor import PerUserUpdateProcessor
+
+HANDLER_SECONDS = 0.01
+
+def make_updates(users, per_user):
+    updates = []
+    for n in range(per_user):
+        for user_id in range(1, users + 1):
+            user = User(user_id, "user", False)
+            message = Message(n, datetime.now(), Chat(user_id, Chat.PRIVATE), from_user=user, text=f"msg {n}")
+            updates.append(Update(len(updates) + 1, message=message))
+    return updates
+
+async def run(workers, updates):
+    processor = PerUserUpdateProcessor(workers)
+    seen = {}
+
+    async def handler(update):
+        await asyncio.sleep(HANDLER_SECONDS)
+        user_id = update.effective_user.id
+        if seen.get(user_id, -1) >= update.message.message_id:
+            raise AssertionError(f"user {user_id} processed out of order")
+        seen[user_id] = update.message.message_id
+
+    start = time.perf_counter()
+    await asyncio.gather(*(processor.process_update(u, handler(u)) for u in updates))
+    elapsed = time.perf_counter() - start
+    print(f"workers={workers:>4}  {len(updates) / elapsed:>8.0f} updates/s  ({elapsed:.2f}s, order ok)")
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    per_user = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    updates = make_updates(users, per_user)
+    for workers in (1, 4, 16, 64, 256):
+        asyncio.run(run(workers, updates))
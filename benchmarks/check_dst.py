@@ -0,0 +1,78 @@
+"""Check reminders across the New York spring-forward jump on 8 March 2026.
+
+At 02:00 that night clocks jump to 03:00, so 02:00-02:59 does not exist and the day is 23
+hours long. The cases use the bot's own parser and recurrence code:
+
+  daily 08:00        "every day 08:00" fires at 08:00 local time on each side of the jump
+  in 24 hours        parsed at 01:30 just before the jump: exactly 86400 s later, which the
+                     wall clock shows as 02:30 the next day
+  one-off 02:30      "8 March 2026 02:30" does not exist: it fires at 03:30, an hour later
+                     by the clock but the same instant as 02:30 standard time
+  daily 02:30        "every day 02:30" fires at 03:30 on the 8th and is back at 02:30 on
+                     the 9th, instead of drifting to 03:30 for good
+
+The script exits with an error if a case does not come out as expected.
+
+Run from the repository root: python benchmarks/check_dst.py
+"""
+import os, sys
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from deadline_parser import parse_deadline, parse_recurrence
+from recurrence import next_occurrence
+
+ZONE = ZoneInfo("America/New_York")
+
+def local(ts):
+    return datetime.fromtimestamp(ts, ZONE)
+
+def wall(moment):
+    return moment.strftime("%d %b %H:%M %Z")
+
+def series(text, now, count):
+    """The first count fires of a repeating reminder, the way the bot advances it."""
+    first, rule = parse_recurrence(text, now)
+    fires = [first.timestamp()]
+    while len(fires) < count:
+        fires.append(next_occurrence(rule, fires[-1], fires[-1], ZONE))
+    return [local(ts) for ts in fires]
+
+def check_series(name, text, expected):
+    fires = series(text, datetime(2026, 3, 6, 12, 0, tzinfo=ZONE), len(expected))
+    got = [wall(moment) for moment in fires]
+    ok = got == expected
+    print(f"{name:<14} {', '.join(got)}: {'ok' if ok else 'FAILED, expected ' + ', '.join(expected)}")
+    return ok
+
+def check_in_24_hours():
+    now = datetime(2026, 3, 8, 1, 30, tzinfo=ZONE)
+    deadline = parse_deadline("in 24 hours", now)
+    elapsed = deadline.timestamp() - now.timestamp()
+    ok = elapsed == 86400 and wall(local(deadline.timestamp())) == "09 Mar 02:30 EDT"
+    print(f"{'in 24 hours':<14} from {wall(now)}: {wall(local(deadline.timestamp()))}, "
+          f"{elapsed:.0f} s later: {'ok' if ok else 'FAILED, expected 09 Mar 02:30 EDT, 86400 s'}")
+    return ok
+
+def check_one_off_in_gap():
+    now = datetime(2026, 3, 7, 12, 0, tzinfo=ZONE)
+    deadline = parse_deadline("8 March 2026 02:30", now)
+    fires = local(deadline.timestamp())
+    standard = datetime(2026, 3, 8, 7, 30, tzinfo=timezone.utc)  # 02:30 EST
+    ok = wall(fires) == "08 Mar 03:30 EDT" and deadline.timestamp() == standard.timestamp()
+    print(f"{'one-off 02:30':<14} {wall(fires)}: {'ok' if ok else 'FAILED, expected 08 Mar 03:30 EDT'}")
+    return ok
+
+if __name__ == "__main__":
+    results = [
+        check_series("daily 08:00", "every day 08:00",
+                     ["07 Mar 08:00 EST", "08 Mar 08:00 EDT", "09 Mar 08:00 EDT"]),
+        check_in_24_hours(),
+        check_one_off_in_gap(),
+        check_series("daily 02:30", "every day 02:30",
+                     ["07 Mar 02:30 EST", "08 Mar 03:30 EDT", "09 Mar 02:30 EDT", "10 Mar 02:30 EDT"]),
+    ]
+    if not all(results):
+        raise SystemExit("FAILED: a reminder moved across the DST change")
@@ -0,0 +1,123 @@
+"""Check that ReminderScheduler sends nothing for a cancelled reminder and leaves nothing behind.
+
+cancel        cancels single reminders and whole users (/stop) among many scheduled ones, then
+              drains the heap: every fire of the others comes out once, none of the cancelled
+              ones do
+compaction    cancelling most of the heap rebuilds it without the stale entries; cancelling a
+              few does not
+load race     rows a database load read before a cancel (loaded_at) are not scheduled again,
+              while rows read by a load begun after it are
+windows       scheduling the same reminder over overlapping windows queues each fire once
+drained       after each case, the reminder and user indexes are empty
+
+The script exits with an error if a check fails.
+
+Run from the repository root: python benchmarks/check_scheduler.py
+"""
+import os, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import ReminderScheduler, REMINDER_INTERVALS
+
+FIRES = len(REMINDER_INTERVALS)
+NOW = time.time()
+DEADLINE = NOW + 6 * 86400  # every interval of the reminder is still ahead
+
+async def _noop(context, batch):
+    pass
+
+def check(condition, message):
+    if not condition:
+        raise SystemExit(f"FAILED: {message}")
+
+def drain(scheduler):
+    """Every fire up to the last deadline, as (reminder_id, interval label) pairs."""
+    fired = []
+    while True:
+        batch = scheduler.pop_due(DEADLINE + 86400)
+        if not batch:
+            break
+        fired.extend((data["reminder_id"], data["interval"]) for _, data in batch)
+    return fired
+
+def check_drained(scheduler, case):
+    check(not scheduler._reminders, f"{case}: reminders left after draining")
+    check(not scheduler._user_reminders, f"{case}: users left after draining")
+    check(not scheduler._heap, f"{case}: heap entries left after draining")
+
+def check_cancel():
+    scheduler = ReminderScheduler(_noop, batch_size=100)
+    for reminder_id in range(1000):
+        scheduler.schedule(reminder_id, reminder_id % 10, reminder_id % 10, f"task {reminder_id}",
+                           DEADLINE + reminder_id, now=NOW)
+    cancelled = {reminder_id for reminder_id in range(0, 1000, 7) if reminder_id % 10 != 3}
+    for reminder_id in cancelled:
+        check(scheduler.cancel(reminder_id), f"cancel({reminder_id}) found nothing to cancel")
+    check(not scheduler.cancel(7), "cancelling twice reported pending fires")
+    cancelled |= set(scheduler.cancel_user(3))
+    check(3 not in scheduler._user_reminders, "cancel_user left the user indexed")
+    scheduler.set_user_timezone(3, None)  # a /timezone after /stop must not fail
+    fired = drain(scheduler)
+    orphans = {reminder_id for reminder_id, _ in fired} & cancelled
+    check(not orphans, f"{len(orphans)} cancelled reminders were sent")
+    check(len(fired) == len(set(fired)), "a fire was sent twice")
+    check(len(fired) == (1000 - len(cancelled)) * FIRES, "a fire of a live reminder was lost")
+    check_drained(scheduler, "cancel")
+    print(f"cancel       {len(cancelled)} of 1000 reminders cancelled, {len(fired)} fires sent, none cancelled: ok")
+
+def check_compaction():
+    scheduler = ReminderScheduler(_noop)
+    for reminder_id in range(2000):
+        scheduler.schedule(reminder_id, reminder_id, reminder_id, "task", DEADLINE, now=NOW)
+    for reminder_id in range(100):
+        scheduler.cancel(reminder_id)
+    check(len(scheduler) == 2000 * FIRES, "a few cancels rebuilt the heap")
+    check(scheduler._stale == 100 * FIRES, "stale entries were miscounted")
+    for reminder_id in range(100, 1500):
+        scheduler.cancel(reminder_id)
+    check(len(scheduler) <= 500 * FIRES * 2, "the heap was not rebuilt once stale entries were most of it")
+    check(len(scheduler) - scheduler._stale == 500 * FIRES, "live entries were lost when the heap was rebuilt")
+    fired = drain(scheduler)
+    check(len(fired) == 500 * FIRES, "a fire was lost or sent twice after the heap was rebuilt")
+    check(all(reminder_id >= 1500 for reminder_id, _ in fired), "a cancelled reminder was sent after compaction")
+    check(scheduler._stale == 0, "stale count not back to zero after draining")
+    check_drained(scheduler, "compaction")
+    print(f"compaction   1500 of 2000 reminders cancelled, heap rebuilt, {len(fired)} fires sent: ok")
+
+def check_load_race():
+    scheduler = ReminderScheduler(_noop)
+    loaded_at = scheduler.begin_load()
+    # While the load reads from the database, one reminder is deleted and one user sends /stop
+    scheduler.cancel(1)
+    scheduler.cancel_user(20)
+    for reminder_id, user_id in ((1, 10), (2, 10), (3, 20)):
+        scheduler.schedule(reminder_id, user_id, user_id, "task", DEADLINE, now=NOW, loaded_at=loaded_at)
+    check(1 not in scheduler, "a reminder deleted during a load was scheduled again")
+    check(3 not in scheduler, "a reminder of a user who sent /stop during a load was scheduled again")
+    check(2 in scheduler, "a reminder untouched during the load was not scheduled")
+    # The user sets a new reminder after /stop; the next load reads it
+    loaded_at = scheduler.begin_load()
+    scheduler.schedule(4, 20, 20, "task", DEADLINE, now=NOW, loaded_at=loaded_at)
+    check(4 in scheduler, "a reminder read by a load begun after the cancel was dropped")
+    fired = {reminder_id for reminder_id, _ in drain(scheduler)}
+    check(fired == {2, 4}, f"sent reminders {sorted(fired)}, expected [2, 4]")
+    check_drained(scheduler, "load race")
+    print("load race    rows read before a cancel skipped, rows read after it scheduled: ok")
+
+def check_windows():
+    scheduler = ReminderScheduler(_noop)
+    # Top-ups over overlapping windows, as load_reminder_window does every 15 minutes
+    for start in range(0, 7 * 86400, 6 * 3600):
+        scheduler.schedule(1, 1, 1, "task", DEADLINE, now=NOW + start, until=NOW + start + 12 * 3600)
+    fired = drain(scheduler)
+    check(sorted(label for _, label in fired) == sorted(label for _, label in REMINDER_INTERVALS),
+          "overlapping windows did not queue each fire exactly once")
+    check_drained(scheduler, "windows")
+    print(f"windows      {len(fired)} fires over overlapping windows, each once: ok")
+
+if __name__ == "__main__":
+    check_cancel()
+    check_compaction()
+    check_load_race()
+    check_windows()
@@ -0,0 +1,115 @@
+"""Run three --worker-only processes on one database, kill one, and check every reminder is sent once.
+
+Each worker owns one of three shards (user_id % 3) and sends through the fake Bot API from
+loadtest.py. Ninety reminders, thirty per shard, come due in three waves:
+
+  wave A    before the kill; each worker sends its own shard's reminders
+  wave B    while the killed worker's shard is unowned; its reminders are caught up by the
+            worker that takes the shard over
+  wave C    after the takeover
+
+The worker is killed with SIGKILL between waves, so nothing it sent is missing from the
+delivery ledger and a resend would be a real duplicate. Leases last SHARD_LEASE_SECONDS=6
+instead of 30 to keep the run short. The script also checks that --shards without a valid
+--shard-index is refused, since the first process would otherwise take every shard.
+
+The script exits with an error if a reminder is sent twice or not at all.
+
+Run from the repository root: python benchmarks/check_sharding.py
+"""
+import asyncio, os, shutil, signal, subprocess, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import db
+from loadtest import BOOTSTRAP, DESC_RE, ROOT, TOKEN, FakeBotApi
+
+SHARDS = 3
+LEASE_SECONDS = 6
+KILLED_SHARD = 1
+KILL_AT = 18  # seconds after the workers start
+# Seconds after the workers start at which each wave's deadlines begin
+WAVES = {"A": 10, "B": 20, "C": 40}
+WAVE_SPREAD = 6
+RUN_FOR = 65
+
+def check(condition, message):
+    if not condition:
+        raise SystemExit(f"FAILED: {message}")
+
+def fill(path, start):
+    db.close_db()
+    db.DB_PATH = path
+    db.init_db()
+    expected = {}
+    user_id = 1
+    for wave, offset in WAVES.items():
+        for n in range(SHARDS * 10):
+            desc = f"shard check {wave}{n}"
+            db.add_reminder_to_db(user_id, desc, start + offset + n * WAVE_SPREAD / (SHARDS * 10))
+            expected[desc] = user_id % SHARDS
+            user_id += 1
+    db.close_db()
+    return expected
+
+def check_shard_index_required(workdir):
+    result = subprocess.run(
+        [sys.executable, "-c", BOOTSTRAP, os.path.join(workdir, "refused.db"), "--shards", str(SHARDS), "--worker-only"],
+        cwd=ROOT, env=dict(os.environ, BOT_TOKEN=TOKEN), capture_output=True, text=True,
+    )
+    check(result.returncode != 0 and "--shard-index" in result.stderr, "--shards without --shard-index was accepted")
+    print("--shards without --shard-index is refused: ok")
+
+async def run(workdir):
+    api = FakeBotApi()
+    server = await asyncio.start_server(api.handle, "127.0.0.1", 0)
+    api_port = server.sockets[0].getsockname()[1]
+    db_path = os.path.join(workdir, "reminders.db")
+    start = time.time()
+    expected = fill(db_path, start)
+    env = dict(os.environ, BOT_TOKEN=TOKEN, BOT_API_URL=f"http://127.0.0.1:{api_port}/bot", METRICS_PORT="0",
+               SHARD_LEASE_SECONDS=str(LEASE_SECONDS), REMINDER_COALESCE_SECONDS="0.1",
+               DELIVERY_GRACE_MINUTES="0.25")
+    workers = {}
+    try:
+        for shard in range(SHARDS):
+            with open(os.path.join(workdir, f"worker{shard}.log"), "wb") as log:
+                workers[shard] = subprocess.Popen(
+                    [sys.executable, "-c", BOOTSTRAP, db_path, "--shards", str(SHARDS), "--shard-index", str(shard),
+                     "--worker-only"], cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+                )
+        await asyncio.sleep(start + KILL_AT - time.time())
+        workers[KILLED_SHARD].kill()
+        workers[KILLED_SHARD].wait()
+        await asyncio.sleep(start + RUN_FOR - time.time())
+    finally:
+        for process in workers.values():
+            if process.poll() is None:
+                process.send_signal(signal.SIGINT)
+        for process in workers.values():
+            try:
+                process.wait(30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        server.close()
+    sent = {}
+    for _, _, text in api.reminders:
+        for desc in DESC_RE.findall(text):
+            sent[desc] = sent.get(desc, 0) + 1
+    for wave in WAVES:
+        descs = [desc for desc in expected if desc.startswith(f"shard check {wave}")]
+        killed = [desc for desc in descs if expected[desc] == KILLED_SHARD]
+        print(f"wave {wave}: {sum(1 for desc in descs if sent.get(desc) == 1)}/{len(descs)} sent once, "
+              f"{sum(1 for desc in killed if sent.get(desc) == 1)}/{len(killed)} of them from shard {KILLED_SHARD}")
+    missing = [desc for desc in expected if desc not in sent]
+    duplicates = [desc for desc, count in sent.items() if count > 1]
+    check(not missing, f"{len(missing)} reminders never sent, e.g. {missing[:3]} (logs in {workdir})")
+    check(not duplicates, f"{len(duplicates)} reminders sent more than once, e.g. {duplicates[:3]} (logs in {workdir})")
+    check(set(sent) == set(expected), "a reminder that does not exist was sent")
+
+if __name__ == "__main__":
+    workdir = tempfile.mkdtemp(prefix="check-sharding-")
+    check_shard_index_required(workdir)
+    asyncio.run(run(workdir))
+    shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,466 @@
+"""End-to-end load test of bot.py against a local fake Telegram Bot API.
+
+The script starts a fake Bot API server, then runs bot.py in a subprocess pointed at it through
+BOT_API_URL, with its own temporary database. Synthetic users then drive the bot: /setreminder,
+the Add Reminder button flow, /lihatreminder and Done/Delete. Updates reach the bot by long
+polling or through its webhook.
+
+The report covers:
+- throughput and latency percentiles per action
+- database operations per second, scraped from the bot's /metrics endpoint
+- how close each reminder arrived to its deadline
+
+Every reminder created gets a deadline on a whole minute at least 60 seconds ahead, so its
+"Deadline" fire happens while the test is still waiting. Runs with the same --seed issue the
+same sequence of actions. Use --json to save a report and --compare to diff it against an
+earlier one.
+
+Run from the repository root:
+    python benchmarks/loadtest.py --mode polling --users 50 --duration 60
+    python benchmarks/loadtest.py --mode webhook --users 200 --rate 1 --json webhook.json
+"""
+import argparse, asyncio, json, math, os, random, re, shutil, signal, socket, subprocess, sys, tempfile, time
+from datetime import datetime
+from urllib.parse import parse_qs
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOKEN = "123456:LOADTEST"
+SECRET = "loadtest-secret"
+BOOTSTRAP = "import sys, db; db.DB_PATH = sys.argv[1]; import bot; bot.main(sys.argv[2:])"
+DESC_RE = re.compile(r"📝 \*(.+?)\*")
+LIST_ITEM_RE = re.compile(r"^(\d+)\. \*(.+?)\*", re.M)
+ACTIONS = ("setreminder", "flow", "list", "done")
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "p50": percentile(values, 0.5),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": max(values, default=0.0),
+    }
+
+class FakeBotApi:
+    """Just enough of the Bot API for bot.py: getUpdates, sendMessage, editMessageText and friends.
+
+    Replies to a chat resolve the future registered by that chat's synthetic user. Reminder
+    notifications are recorded with their arrival time instead.
+    """
+
+    def __init__(self):
+        self.updates = []
+        self._new_update = asyncio.Event()
+        self._update_id = 0
+        self._message_id = 0
+        self.waiting = {}  # key: chat_id, value: future resolved with the next reply
+        self.reminders = []  # (arrival time, chat_id, text)
+        self.calls = {}
+        self.webhook_set = asyncio.Event()
+        self.polling = asyncio.Event()
+
+    def next_message_id(self):
+        self._message_id += 1
+        return self._message_id
+
+    def push_update(self, update, queue=True):
+        self._update_id += 1
+        update["update_id"] = self._update_id
+        if queue:  # handed out by getUpdates; webhook updates are posted instead
+            self.updates.append(update)
+            self._new_update.set()
+        return update
+
+    async def get_updates(self, params):
+        self.polling.set()
+        offset = int(params.get("offset", 0))
+        if offset:
+            self.updates = [u for u in self.updates if u["update_id"] >= offset]
+        if not self.updates:
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), float(params.get("timeout", 0)) or 0.01)
+            except asyncio.TimeoutError:
+                pass
+        return self.updates[: int(params.get("limit", 100))]
+
+    def message(self, chat_id, text, reply_markup=None, message_id=None):
+        message = {
+            "message_id": message_id or self.next_message_id(),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": 1, "is_bot": True, "first_name": "LoadTest"},
+            "text": text,
+        }
+        if reply_markup:
+            message["reply_markup"] = reply_markup
+        return message
+
+    def reply(self, chat_id, message):
+        if message["text"].startswith("🔔"):
+            self.reminders.append((time.time(), chat_id, message["text"]))
+            return
+        future = self.waiting.pop(chat_id, None)
+        if future is not None and not future.done():
+            future.set_result(message)
+
+    async def call(self, method, params):
+        self.calls[method] = self.calls.get(method, 0) + 1
+        if method == "getMe":
+            return {"id": 1, "is_bot": True, "first_name": "LoadTest", "username": "loadtest_bot"}
+        if method == "getUpdates":
+            return await self.get_updates(params)
+        if method in ("sendMessage", "editMessageText"):
+            chat_id = int(params["chat_id"])
+            markup = json.loads(params["reply_markup"]) if params.get("reply_markup") else None
+            message_id = int(params["message_id"]) if params.get("message_id") else None
+            message = self.message(chat_id, params["text"], markup, message_id)
+            self.reply(chat_id, message)
+            return message
+        if method == "setWebhook":
+            self.webhook_set.set()
+        return True
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request = await reader.readline()
+                if not request:
+                    return
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                method = request.split()[1].decode().rsplit("/", 1)[-1]
+                if headers.get("content-type", "").startswith("application/x-www-form-urlencoded"):
+                    params = {k: v[0] for k, v in parse_qs(body.decode()).items()}
+                else:
+                    params = {}  # multipart uploads are accepted but not inspected
+                result = await self.call(method, params)
+                payload = json.dumps({"ok": True, "result": result}).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass  # client went away, or the harness is shutting down
+        finally:
+            writer.close()
+
+class SyntheticUser:
+    def __init__(self, user_id, harness, rng):
+        self.user_id = user_id
+        self.harness = harness
+        self.rng = rng
+        self.count = 0
+        self.listing = None  # last /lihatreminder reply
+
+    def user(self):
+        return {"id": self.user_id, "is_bot": False, "first_name": f"user{self.user_id}"}
+
+    def next_desc(self, kind):
+        self.count += 1
+        return f"{kind}-{self.user_id}-{self.count}"
+
+    async def send_text(self, text):
+        message = {
+            "message_id": self.harness.api.next_message_id(),
+            "date": int(time.time()),
+            "chat": {"id": self.user_id, "type": "private"},
+            "from": self.user(),
+            "text": text,
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return await self.harness.request(self.user_id, {"message": message})
+
+    async def press(self, data, message):
+        callback = {
+            "id": str(self.harness.api.next_message_id()),
+            "from": self.user(),
+            "chat_instance": str(self.user_id),
+            "data": data,
+            "message": {key: message[key] for key in ("message_id", "date", "chat", "text")},
+        }
+        return await self.harness.request(self.user_id, {"callback_query": callback})
+
+    async def setreminder(self):
+        desc = self.next_desc("task")
+        deadline = self.harness.next_deadline()
+        self.harness.expect(desc, deadline)
+        await self.send_text(f"/setreminder {desc} {datetime.fromtimestamp(deadline):%d %B %H:%M}")
+
+    async def flow(self):
+        prompt = self.harness.api.message(self.user_id, "🔔 *Reminder Bot* 🔔")
+        if await self.press("add_reminder", prompt) is None:
+            return
+        desc = self.next_desc("flow")
+        if await self.send_text(desc) is None:
+            return
+        deadline = self.harness.next_deadline()
+        self.harness.expect(desc, deadline)
+        await self.send_text(f"{datetime.fromtimestamp(deadline):%d %B %H:%M}")
+
+    async def list(self):
+        self.listing = await self.send_text("/lihatreminder")
+
+    async def done(self):
+        if self.listing is None:
+            await self.list()
+        listing = self.listing
+        buttons = [
+            button["callback_data"]
+            for row in (listing or {}).get("reply_markup", {}).get("inline_keyboard", [])
+            for button in row
+            if button["callback_data"].startswith(("done_", "delete_"))
+        ]
+        if not buttons:
+            return
+        data = self.rng.choice(buttons)
+        number = buttons.index(data) // 2 + 1  # one Done and one Delete button per row
+        descs = dict(LIST_ITEM_RE.findall(listing["text"]))
+        self.listing = await self.press(data, listing)
+        if self.listing is not None and str(number) in descs:
+            self.harness.cancelled.add(descs[str(number)])
+
+    async def run(self, end, rate, weights):
+        while time.time() < end:
+            action = self.rng.choices(ACTIONS, weights)[0]
+            started = time.perf_counter()
+            await getattr(self, action)()
+            self.harness.action_latencies.setdefault(action, []).append(time.perf_counter() - started)
+            await asyncio.sleep(self.rng.expovariate(rate))
+
+class Harness:
+    def __init__(self, args):
+        self.args = args
+        self.api = FakeBotApi()
+        self.latencies = []
+        self.action_latencies = {}
+        self.timeouts = 0
+        self.expected = {}  # key: reminder description, value: deadline
+        self.cancelled = set()
+        self.webhook_url = None
+        self.client = None
+
+    def next_deadline(self):
+        # Whole minutes only (the bot's deadline format has no seconds), at least a minute out
+        return math.ceil((time.time() + 60) / 60) * 60
+
+    def expect(self, desc, deadline):
+        self.expected[desc] = deadline
+
+    async def request(self, chat_id, update):
+        future = asyncio.get_running_loop().create_future()
+        self.api.waiting[chat_id] = future
+        started = time.perf_counter()
+        update = self.api.push_update(update, queue=self.webhook_url is None)
+        if self.webhook_url is not None:
+            await self.client.post(self.webhook_url, json=update, headers={"X-Telegram-Bot-Api-Secret-Token": SECRET})
+        try:
+            reply = await asyncio.wait_for(future, self.args.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self.api.waiting.pop(chat_id, None)
+            return None
+        self.latencies.append(time.perf_counter() - started)
+        return reply
+
+    async def scrape_db_ops(self):
+        try:
+            response = await self.client.get(f"http://127.0.0.1:{self.metrics_port}/metrics")
+        except httpx.HTTPError:
+            return None
+        return sum(
+            float(line.rsplit(" ", 1)[1])
+            for line in response.text.splitlines()
+            if line.startswith("bot_db_query_seconds_count")
+        )
+
+    def start_bot(self, api_port, workdir):
+        args = self.args
+        self.metrics_port = free_port()
+        bot_args = ["--mode", args.mode, "--metrics-port", str(self.metrics_port),
+                    "--max-concurrent-updates", str(args.max_concurrent_updates)]
+        if args.mode == "webhook":
+            webhook_port = free_port()
+            bot_args += ["--webhook-url", f"http://127.0.0.1:{webhook_port}", "--listen", "127.0.0.1",
+                         "--port", str(webhook_port), "--url-path", "telegram", "--secret-token", SECRET]
+            self.webhook_url = f"http://127.0.0.1:{webhook_port}/telegram"
+        # Synthetic users send faster than the per-user rate limit allows; measure the handlers instead
+        env = dict(os.environ, BOT_TOKEN=TOKEN, BOT_API_URL=f"http://127.0.0.1:{api_port}/bot", METRICS_PORT="0",
+                   RATE_LIMIT_PER_MINUTE="0")
+        self.log_path = os.path.join(workdir, "bot.log")
+        with open(self.log_path, "wb") as log:
+            return subprocess.Popen(
+                [sys.executable, "-c", BOOTSTRAP, os.path.join(workdir, "reminders.db"), *bot_args],
+                cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+            )
+
+    async def wait_ready(self, process):
+        ready = self.api.webhook_set if self.args.mode == "webhook" else self.api.polling
+        deadline = time.time() + 30
+        while not ready.is_set():
+            if process.poll() is not None or time.time() > deadline:
+                raise SystemExit(f"bot.py did not start, see {self.log_path}")
+            await asyncio.sleep(0.1)
+        # setup_loaded_reminders runs in the background once the bot has started; let it finish
+        await asyncio.sleep(1.5)
+
+    async def run(self):
+        args = self.args
+        workdir = tempfile.mkdtemp(prefix="loadtest-")
+        server = await asyncio.start_server(self.api.handle, "127.0.0.1", 0)
+        api_port = server.sockets[0].getsockname()[1]
+        process = self.start_bot(api_port, workdir)
+        self.client = httpx.AsyncClient(timeout=args.timeout, limits=httpx.Limits(max_connections=100))
+        try:
+            await self.wait_ready(process)
+            db_ops_before = await self.scrape_db_ops()
+            weights = [args.mix.get(action, 0) for action in ACTIONS]
+            users = [SyntheticUser(1000 + n, self, random.Random(args.seed * 100003 + n)) for n in range(args.users)]
+            started = time.time()
+            end = started + args.duration
+            await asyncio.gather(*(user.run(end, args.rate, weights) for user in users))
+            load_seconds = time.time() - started
+            db_ops_after = await self.scrape_db_ops()
+            await self.wait_for_fires(started + load_seconds)
+        finally:
+            await self.client.aclose()
+            process.send_signal(signal.SIGINT)
+            try:
+                process.wait(30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+            server.close()
+        report = self.report(load_seconds, db_ops_before, db_ops_after)
+        if args.keep:
+            print(f"bot log and database kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+        return report
+
+    async def wait_for_fires(self, load_end):
+        if self.args.fire_wait <= 0 or not self.expected:
+            self.fire_cutoff = 0
+            return
+        self.fire_cutoff = min(max(self.expected.values()), load_end + self.args.fire_wait)
+        # Reminders are coalesced for a couple of seconds before they are sent
+        while time.time() < self.fire_cutoff + 10:
+            await asyncio.sleep(0.5)
+
+    def report(self, load_seconds, db_ops_before, db_ops_after):
+        args = self.args
+        arrivals = {}
+        for arrived, _, text in self.api.reminders:
+            for desc in DESC_RE.findall(text):
+                arrivals.setdefault(desc, []).append(arrived)
+        due = {d: ts for d, ts in self.expected.items() if ts <= self.fire_cutoff and d not in self.cancelled}
+        lags = [arrivals[d][0] - ts for d, ts in due.items() if d in arrivals]
+        return {
+            "config": {key: getattr(args, key) for key in
+                       ("mode", "users", "rate", "duration", "seed", "max_concurrent_updates", "mix")},
+            "requests": len(self.latencies),
+            "timeouts": self.timeouts,
+            "throughput": len(self.latencies) / load_seconds,
+            "latency": summarize(self.latencies),
+            "actions": {action: summarize(values) for action, values in sorted(self.action_latencies.items())},
+            "db_ops_per_second": (
+                (db_ops_after - db_ops_before) / load_seconds
+                if db_ops_before is not None and db_ops_after is not None else None
+            ),
+            "fires": {
+                "expected": len(due),
+                "received": len(lags),
+                "missing": len(due) - len(lags),
+                "duplicates": sum(len(times) - 1 for times in arrivals.values()),
+                "after_delete": sum(1 for d in self.cancelled if d in arrivals),
+                "lag": summarize(lags),
+            },
+            "api_calls": self.api.calls,
+        }
+
+def print_report(report, baseline=None):
+    def delta(value, base):
+        if base is None or value is None or not base:
+            return ""
+        return f"  ({(value - base) / base * 100:+.1f}%)"
+
+    base = baseline or {}
+    latency, base_latency = report["latency"], base.get("latency", {})
+    print(f"mode={report['config']['mode']} users={report['config']['users']} "
+          f"rate={report['config']['rate']}/s per user duration={report['config']['duration']}s")
+    print(f"requests: {report['requests']}  timeouts: {report['timeouts']}")
+    print(f"throughput: {report['throughput']:.1f} req/s{delta(report['throughput'], base.get('throughput'))}")
+    for q in ("p50", "p95", "p99", "max"):
+        print(f"latency {q}: {latency[q] * 1000:.1f} ms{delta(latency[q], base_latency.get(q))}")
+    for action, stats in report["actions"].items():
+        print(f"  {action:<12} n={stats['count']:<6} p50={stats['p50'] * 1000:.1f} ms  p99={stats['p99'] * 1000:.1f} ms")
+    if report["db_ops_per_second"] is not None:
+        print(f"db ops/s: {report['db_ops_per_second']:.1f}{delta(report['db_ops_per_second'], base.get('db_ops_per_second'))}")
+    fires = report["fires"]
+    print(f"reminders: {fires['received']}/{fires['expected']} delivered, {fires['missing']} missing, "
+          f"{fires['duplicates']} duplicates, {fires['after_delete']} after delete")
+    if fires["received"]:
+        lag = fires["lag"]
+        print(f"fire lag: p50={lag['p50']:.2f}s p95={lag['p95']:.2f}s max={lag['max']:.2f}s"
+              f"{delta(lag['p50'], base.get('fires', {}).get('lag', {}).get('p50'))}")
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        action, _, weight = part.partition("=")
+        if action not in ACTIONS:
+            raise argparse.ArgumentTypeError(f"unknown action {action!r}, expected one of {', '.join(ACTIONS)}")
+        mix[action] = float(weight or 1)
+    return mix
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--mode", choices=("polling", "webhook"), default="polling")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=0.5, help="actions per second per user")
+    parser.add_argument("--duration", type=float, default=60, help="seconds of load")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("setreminder=3,flow=2,list=3,done=2"),
+                        help="action weights, e.g. setreminder=3,flow=2,list=3,done=2")
+    parser.add_argument("--max-concurrent-updates", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=30, help="seconds to wait for each reply")
+    parser.add_argument("--fire-wait", type=float, default=150,
+                        help="seconds after the load to wait for reminders to fire (0 = skip)")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--compare", help="print changes against a report saved with --json")
+    parser.add_argument("--keep", action="store_true", help="keep the bot's log and database")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(Harness(args).run())
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
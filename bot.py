@@ -1,29 +1,26 @@
-import logging, sys, subprocess
-from telegram.ext import ApplicationBuilder, CommandHandler, CallbackQueryHandler, MessageHandler, filters
-from db import init_db
+import argparse, asyncio, logging, os, signal
+from importlib.util import find_spec
+from telegram import Update
+from telegram.ext import ApplicationBuilder, CommandHandler, CallbackQueryHandler, MessageHandler, TypeHandler, filters
+from db import init_db, close_db
+import handlers
 from handlers import (start, set_task, selesai, add_tugas as original_add_tugas, lihat_tugas,
-                      help_commands, cancel, button_callback, text_handler, setup_loaded_reminders)
+                      help_commands, cancel, button_callback, text_handler, setup_loaded_reminders,
+                      import_command, import_document, export_command, timezone_command,
+                      search_command, stop,
+                      reminder_scheduler, outbox, conversations)
 
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
     level=logging.INFO
 )
 
-# Check & install job-queue
-try:
-    from telegram.ext import JobQueue
-    job_queue_available = True
-except ImportError:
-    job_queue_available = False
-    logging.warning("JobQueue is not available. Reminders will not be sent.")
-    try:
-        logging.info("Attempting to install python-telegram-bot[job-queue]...")
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "python-telegram-bot[job-queue]"])
-        logging.info("Installation successful. Please restart the bot.")
-        print("Job-queue dependency installed. Restart bot to enable reminders.")
-    except Exception as e:
-        logging.error(f"Failed to install dependency: {e}")
-        print("Reminder feature needs job-queue; install with: pip install 'python-telegram-bot[job-queue]' and restart.")
+def missing_extras(mode, worker_only=False):
+    # python-telegram-bot extras this run needs, checked without importing them
+    extras = {"job-queue": "apscheduler"}
+    if mode == "webhook" and not worker_only:
+        extras["webhooks"] = "tornado"
+    return [extra for extra, module in extras.items() if find_spec(module) is None]
 
 # Override add_tugas handler to send short confirmation message
 def add_tugas(update, context):
@@ -31,10 +28,94 @@ def add_tugas(update, context):
     context.bot.send_message(chat_id=update.effective_chat.id, text="✅ Reminder Saved!")
     return result
 
-def main():
-    token = "YOUR_BOT_TOKEN"  # Replace with your bot token
+# Set by main() when --metrics-port is given
+metrics_server = None
+
+async def on_startup(application):
+    outbox.start(application.bot)
+    if metrics_server is not None:
+        await metrics_server.start()
+
+async def on_shutdown(application):
+    if metrics_server is not None:
+        await metrics_server.stop()
+    await outbox.stop()
+    await handlers.delivery_ledger.flush()
+    if handlers.shards is not None:
+        await handlers.shards.release()
+    close_db()
+
+async def run_worker(app):
+    # Scheduler-only process: sends reminders for its shards but takes no Telegram updates
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows
+            pass
+    async with app:
+        await on_startup(app)
+        await app.start()
+        try:
+            await stop.wait()
+        finally:
+            await app.stop()
+    await on_shutdown(app)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Telegram reminder bot")
+    parser.add_argument("--mode", choices=("polling", "webhook"), default=os.environ.get("BOT_MODE", "polling"),
+                        help="receive updates by long polling (default) or through a webhook")
+    parser.add_argument("--webhook-url", default=os.environ.get("WEBHOOK_URL"),
+                        help="public HTTPS URL Telegram sends updates to")
+    parser.add_argument("--listen", default=os.environ.get("WEBHOOK_LISTEN", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("WEBHOOK_PORT", "8443")))
+    parser.add_argument("--url-path", default=os.environ.get("WEBHOOK_PATH", "telegram"))
+    parser.add_argument("--secret-token", default=os.environ.get("WEBHOOK_SECRET"),
+                        help="value Telegram must send in X-Telegram-Bot-Api-Secret-Token (random if unset)")
+    parser.add_argument("--max-concurrent-updates", type=int, default=int(os.environ.get("MAX_CONCURRENT_UPDATES", "1")),
+                        help="updates processed at the same time; updates from one user stay in order (1 = sequential)")
+    parser.add_argument("--shards", type=int, default=int(os.environ.get("SHARD_COUNT", "1")),
+                        help="partition reminders by user_id across this many processes sharing the database")
+    parser.add_argument("--shard-index", type=int, default=os.environ.get("SHARD_INDEX"),
+                        help="shard this process owns, from 0 to SHARDS - 1 (required with --shards)")
+    parser.add_argument("--worker-only", action="store_true", default=os.environ.get("WORKER_ONLY") == "1",
+                        help="only send reminders; another process handles Telegram updates")
+    parser.add_argument("--metrics-port", type=int, default=int(os.environ.get("METRICS_PORT", "0")),
+                        help="serve Prometheus metrics on this port at /metrics (0 = off)")
+    parser.add_argument("--metrics-host", default=os.environ.get("METRICS_HOST", "127.0.0.1"))
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    global metrics_server
+    args = parse_args(argv)
+    missing = missing_extras(args.mode, args.worker_only)
+    if missing:
+        raise SystemExit(f"Missing dependencies; install them with: pip install \"python-telegram-bot[{','.join(missing)}]\"")
+    if args.shards > 1 and (args.shard_index is None or not 0 <= args.shard_index < args.shards):
+        # Without one, the first process to start would take every shard and the others none
+        raise SystemExit(f"--shards {args.shards} needs --shard-index (or SHARD_INDEX) from 0 to {args.shards - 1}")
+    if args.metrics_port:
+        from metrics import MetricsServer
+        metrics_server = MetricsServer(args.metrics_host, args.metrics_port)
+    token = os.environ.get("BOT_TOKEN", "YOUR_BOT_TOKEN")  # Replace with your bot token or set BOT_TOKEN
     init_db()
-    app = ApplicationBuilder().token(token).build()
+    if args.shards > 1:
+        from sharding import ShardLeases
+        handlers.enable_sharding(ShardLeases(args.shards, preferred=args.shard_index))
+    builder = ApplicationBuilder().token(token).post_init(on_startup).post_shutdown(on_shutdown)
+    if args.max_concurrent_updates > 1:
+        from update_processor import PerUserUpdateProcessor
+        builder = builder.concurrent_updates(PerUserUpdateProcessor(args.max_concurrent_updates))
+    if os.environ.get("BOT_API_URL"):
+        # e.g. a local Bot API server or a fake one for testing
+        builder = builder.base_url(os.environ["BOT_API_URL"])
+    if args.worker_only:
+        builder = builder.updater(None)
+    app = builder.build()
+    if handlers.rate_limiter is not None:
+        app.add_handler(TypeHandler(Update, handlers.throttle), group=-1)
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("setreminder", set_task))
     app.add_handler(CommandHandler("selesai", selesai))
@@ -42,12 +123,37 @@ def main():
     app.add_handler(CommandHandler("lihatreminder", lihat_tugas))
     app.add_handler(CommandHandler("custom", help_commands))
     app.add_handler(CommandHandler("cancel", cancel))
+    app.add_handler(CommandHandler("import", import_command))
+    app.add_handler(CommandHandler("export", export_command))
+    app.add_handler(CommandHandler("timezone", timezone_command))
+    app.add_handler(CommandHandler("cari", search_command))
+    app.add_handler(MessageHandler(filters.Document.ALL, import_document))
     app.add_handler(CallbackQueryHandler(button_callback))
     app.add_handler(CommandHandler("help", help_commands))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, text_handler))
-    app.add_handler(CommandHandler("stop", cancel))  # or your stop handler as imported, if applicable
-    app.job_queue.run_once(lambda context: setup_loaded_reminders(app), when=1)
-    app.run_polling()
+    app.add_handler(CommandHandler("stop", stop))
+    reminder_scheduler.start(app.job_queue)
+    app.job_queue.run_repeating(outbox.log_stats, interval=300, first=300)
+    app.job_queue.run_repeating(conversations.evict_stale, interval=600, first=600)
+    # Updates are taken while reminders are rehydrated in the background
+    app.job_queue.run_once(lambda context: setup_loaded_reminders(app), when=0)
+    if args.worker_only:
+        asyncio.run(run_worker(app))
+    elif args.mode == "webhook":
+        if not args.webhook_url:
+            raise SystemExit("Webhook mode needs --webhook-url or WEBHOOK_URL")
+        import secrets
+        app.run_webhook(
+            listen=args.listen,
+            port=args.port,
+            url_path=args.url_path,
+            webhook_url=f"{args.webhook_url.rstrip('/')}/{args.url_path}",
+            secret_token=args.secret_token or secrets.token_urlsafe(32),
+            # Telegram accepts 1-100 webhook connections
+            max_connections=min(100, max(args.max_concurrent_updates, 40)),
+        )
+    else:
+        app.run_polling()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,59 +1,662 @@
 import sqlite3
 import os
+import re
+import logging
+import asyncio
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from metrics import DB_SECONDS
+from recurrence import next_occurrence
+from utils import get_zone
 
 # Set up data directory and database path
 DATA_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
 DB_PATH = os.path.join(DATA_FOLDER, "reminders.db")
 
+# Number of pooled connections (one per executor thread) used by run_db
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "4"))
+
 if not os.path.exists(DATA_FOLDER):
     os.makedirs(DATA_FOLDER)
 
+# Each executor thread keeps one long-lived connection; sqlite3 caches the
+# prepared statements per connection, so the SQL below is kept as constants.
+_local = threading.local()
+_executor = None
+_executor_lock = threading.Lock()
+
+SQL_INSERT_REMINDER = "INSERT INTO reminders (user_id, description, deadline, recurrence) VALUES (?, ?, ?, ?)"
+SQL_DELETE_REMINDER = "DELETE FROM reminders WHERE id = ?"
+SQL_DELETE_USER_REMINDERS = "DELETE FROM reminders WHERE user_id = ?"
+SQL_SELECT_USER_REMINDERS = "SELECT id, description, deadline FROM reminders WHERE user_id = ?"
+# Rows for the scheduler carry the owner's time zone (NULL: BOT_TIMEZONE / server local time)
+SQL_SELECT_DUE_REMINDERS = (
+    "SELECT id, reminders.user_id, description, deadline, timezone FROM reminders "
+    "LEFT JOIN user_settings ON user_settings.user_id = reminders.user_id "
+    "WHERE deadline >= ? AND deadline < ? AND (deadline > ? OR id > ?) "
+    "ORDER BY deadline, id LIMIT ?"
+)
+SQL_SELECT_PAGE_AFTER = (
+    "SELECT id, description, deadline, recurrence FROM reminders WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?"
+)
+SQL_SELECT_PAGE_BEFORE = (
+    "SELECT id, description, deadline, recurrence FROM reminders WHERE user_id = ? AND id < ? ORDER BY id DESC LIMIT ?"
+)
+SQL_EXISTS_BEFORE = "SELECT 1 FROM reminders WHERE user_id = ? AND id < ? LIMIT 1"
+SQL_EXISTS_AFTER = "SELECT 1 FROM reminders WHERE user_id = ? AND id > ? LIMIT 1"
+SQL_SAVE_CONVERSATION = (
+    "INSERT INTO conversations (user_id, state, description, updated_at) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(user_id) DO UPDATE SET state = excluded.state, description = excluded.description, "
+    "updated_at = excluded.updated_at"
+)
+SQL_LOAD_CONVERSATION = "SELECT state, description, updated_at FROM conversations WHERE user_id = ?"
+SQL_DELETE_CONVERSATION = "DELETE FROM conversations WHERE user_id = ?"
+SQL_DELETE_STALE_CONVERSATIONS = "DELETE FROM conversations WHERE updated_at < ?"
+SQL_SELECT_LEASE = "SELECT owner, expires_at, resume_from FROM shard_leases WHERE shard = ?"
+SQL_ACQUIRE_LEASE = (
+    "INSERT INTO shard_leases (shard, owner, expires_at, resume_from) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(shard) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at, "
+    "resume_from = COALESCE(excluded.resume_from, shard_leases.resume_from) "
+    "WHERE shard_leases.owner = excluded.owner OR shard_leases.expires_at < ?"
+)
+SQL_RELEASE_LEASES = "UPDATE shard_leases SET expires_at = 0 WHERE owner = ?"
+SQL_SELECT_CREATED_AFTER = (
+    "SELECT id, reminders.user_id, description, deadline, timezone FROM reminders "
+    "LEFT JOIN user_settings ON user_settings.user_id = reminders.user_id WHERE id > ? ORDER BY id LIMIT ?"
+)
+SQL_RECORD_DELIVERY = "INSERT OR IGNORE INTO deliveries (reminder_id, fire_ts, sent_at) VALUES (?, ?, ?)"
+SQL_PRUNE_DELIVERIES = (
+    "DELETE FROM deliveries WHERE (reminder_id, fire_ts) IN "
+    "(SELECT reminder_id, fire_ts FROM deliveries WHERE fire_ts < ? LIMIT ?)"
+)
+SQL_ADVANCE_RECURRING = "UPDATE reminders SET deadline = ? WHERE id = ? AND deadline = ?"
+SQL_SELECT_TIMEZONE = "SELECT timezone FROM user_settings WHERE user_id = ?"
+SQL_SAVE_TIMEZONE = (
+    "INSERT INTO user_settings (user_id, timezone) VALUES (?, ?) "
+    "ON CONFLICT(user_id) DO UPDATE SET timezone = excluded.timezone"
+)
+SQL_DELETE_USER_SETTINGS = "DELETE FROM user_settings WHERE user_id = ?"
+# The owner column narrows the match to one user. Not ordered by bm25(): its document
+# frequencies read a common word's postings for every user, which cost more than the match.
+SQL_SEARCH_REMINDERS = (
+    "SELECT id, reminders.description, deadline, recurrence FROM reminders_fts "
+    "JOIN reminders ON reminders.id = reminders_fts.rowid WHERE reminders_fts MATCH ?"
+)
+# Words as the FTS5 unicode61 tokenizer splits them: runs of letters and digits
+SEARCH_TERM_RE = re.compile(r"[^\W_]+")
+SQL_SELECT_USER_DESCRIPTIONS = "SELECT id, description, deadline, recurrence FROM reminders WHERE user_id = ?"
+# Below this many reminders, scanning a user's rows in Python beats the FTS5 index, whose
+# AND with the owner still reads each word's postings for every user (benchmarks/bench_search.py)
+SEARCH_SCAN_MAX_ROWS = 1000
+SQL_USER_HAS_MORE_THAN = "SELECT 1 FROM reminders WHERE user_id = ? LIMIT 1 OFFSET ?"
+SQL_COUNT_USER_REMINDERS = "SELECT COUNT(*) FROM (SELECT 1 FROM reminders WHERE user_id = ? LIMIT ?)"
+
+SQL_SELECT_EXPIRED = "SELECT id, user_id FROM reminders WHERE deadline < ? ORDER BY deadline LIMIT ?"
+SQL_PURGE_ARCHIVE = (
+    "DELETE FROM reminders_archive WHERE id IN (SELECT id FROM reminders_archive WHERE archived_at <= ? LIMIT ?)"
+)
+SQL_DELETE_USER_ARCHIVE = "DELETE FROM reminders_archive WHERE user_id = ?"
+
+# False when this sqlite build has no FTS5; /cari then scans the user's rows
+FTS_AVAILABLE = True
+
+# Bumped whenever init_db needs to migrate an existing database (stored in PRAGMA user_version)
+SCHEMA_VERSION = 2
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH, timeout=30, check_same_thread=False, cached_statements=256)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+def get_connection():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _connect()
+        _local.conn = conn
+    return conn
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix="db")
+    return _executor
+
+async def run_db(func, *args):
+    """Run a blocking db function on the connection pool without stalling the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), _timed, func, args)
+
+def _timed(func, args):
+    started = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        DB_SECONDS.observe(time.perf_counter() - started, query=func.__name__)
+
+def close_db():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute(
-        """
-        CREATE TABLE IF NOT EXISTS reminders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            description TEXT,
-            deadline TEXT
-        )
-        """
-    )
-    conn.commit()
-    conn.close()
-
-def add_reminder_to_db(user_id, desc, deadline_str):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute(
-        "INSERT INTO reminders (user_id, description, deadline) VALUES (?, ?, ?)",
-        (user_id, desc, deadline_str)
-    )
-    reminder_id = c.lastrowid
-    conn.commit()
-    conn.close()
-    return reminder_id
+    conn = get_connection()
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        # Incremental auto-vacuum lets maintenance hand freed pages back to the file system.
+        # Switching an existing database needs one full VACUUM.
+        started = time.perf_counter()
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        logging.info(f"Enabled incremental vacuum in {time.perf_counter() - started:.2f}s")
+    with conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS reminders (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                description TEXT,
+                deadline INTEGER,
+                recurrence TEXT
+            )
+            """
+        )
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version < 1:
+        _migrate_epoch_deadlines(conn)
+    if version < 2:
+        _migrate_recurrence(conn)
+    with conn:
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_reminders_deadline ON reminders (deadline)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_reminders_user_deadline ON reminders (user_id, deadline)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_reminders_user ON reminders (user_id)")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_reminders_recurring ON reminders (deadline) WHERE recurrence IS NOT NULL"
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS conversations (
+                user_id INTEGER PRIMARY KEY,
+                state TEXT NOT NULL,
+                description TEXT,
+                updated_at INTEGER NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_conversations_updated ON conversations (updated_at)")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS reminders_archive (
+                id INTEGER PRIMARY KEY,
+                user_id INTEGER,
+                description TEXT,
+                deadline INTEGER,
+                recurrence TEXT,
+                archived_at INTEGER NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_reminders_archive_archived ON reminders_archive (archived_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_reminders_archive_user ON reminders_archive (user_id)")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS deliveries (
+                reminder_id INTEGER NOT NULL,
+                fire_ts INTEGER NOT NULL,
+                sent_at INTEGER NOT NULL,
+                PRIMARY KEY (reminder_id, fire_ts)
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_deliveries_fire ON deliveries (fire_ts)")
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS reminders_delete_deliveries AFTER DELETE ON reminders
+            BEGIN
+                DELETE FROM deliveries WHERE reminder_id = old.id;
+            END
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS user_settings (
+                user_id INTEGER PRIMARY KEY,
+                timezone TEXT
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS shard_leases (
+                shard INTEGER PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                resume_from REAL
+            )
+            """
+        )
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    _create_search_index(conn)
+
+def _create_search_index(conn):
+    # Contentless FTS5 index of descriptions, plus the owner as a "u<user_id>" token so a
+    # search only ever matches one user's rows. Triggers keep it in sync with every write.
+    global FTS_AVAILABLE
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'reminders_fts'").fetchone() is not None
+    try:
+        with conn:
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS reminders_fts USING fts5("
+                "description, owner, content='', tokenize='unicode61 remove_diacritics 2')"
+            )
+            conn.execute(
+                """
+                CREATE TRIGGER IF NOT EXISTS reminders_fts_insert AFTER INSERT ON reminders
+                BEGIN
+                    INSERT INTO reminders_fts (rowid, description, owner) VALUES (new.id, new.description, 'u' || new.user_id);
+                END
+                """
+            )
+            conn.execute(
+                """
+                CREATE TRIGGER IF NOT EXISTS reminders_fts_delete AFTER DELETE ON reminders
+                BEGIN
+                    INSERT INTO reminders_fts (reminders_fts, rowid, description, owner)
+                    VALUES ('delete', old.id, old.description, 'u' || old.user_id);
+                END
+                """
+            )
+            conn.execute(
+                """
+                CREATE TRIGGER IF NOT EXISTS reminders_fts_update AFTER UPDATE OF description, user_id ON reminders
+                BEGIN
+                    INSERT INTO reminders_fts (reminders_fts, rowid, description, owner)
+                    VALUES ('delete', old.id, old.description, 'u' || old.user_id);
+                    INSERT INTO reminders_fts (rowid, description, owner) VALUES (new.id, new.description, 'u' || new.user_id);
+                END
+                """
+            )
+            if not exists:
+                conn.execute(
+                    "INSERT INTO reminders_fts (rowid, description, owner) "
+                    "SELECT id, description, 'u' || user_id FROM reminders"
+                )
+    except sqlite3.OperationalError as e:
+        FTS_AVAILABLE = False
+        logging.warning(f"Full-text search unavailable ({e}); /cari will scan descriptions instead")
+
+def _migrate_epoch_deadlines(conn):
+    # Older databases stored deadlines as text like "15-April 14:30" without a year
+    columns = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(reminders)")}
+    if columns.get("deadline", "").upper() != "TEXT":
+        return
+    from utils import legacy_deadline_to_timestamp
+    with conn:
+        conn.execute(
+            """
+            CREATE TABLE reminders_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                description TEXT,
+                deadline INTEGER
+            )
+            """
+        )
+        rows = []
+        for reminder_id, user_id, desc, deadline_str in conn.execute(
+            "SELECT id, user_id, description, deadline FROM reminders"
+        ):
+            try:
+                deadline = legacy_deadline_to_timestamp(deadline_str)
+            except (ValueError, AttributeError) as e:
+                logging.error(f"Could not migrate deadline {deadline_str!r} of reminder {reminder_id}: {e}")
+                deadline = None
+            rows.append((reminder_id, user_id, desc, deadline))
+        conn.executemany(
+            "INSERT INTO reminders_new (id, user_id, description, deadline) VALUES (?, ?, ?, ?)", rows
+        )
+        conn.execute("DROP TABLE reminders")
+        conn.execute("ALTER TABLE reminders_new RENAME TO reminders")
+    logging.info(f"Migrated {len(rows)} reminders to epoch deadlines")
+
+def _migrate_recurrence(conn):
+    # Recurring reminders reuse their row, so deliveries are keyed by fire time instead of interval
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(reminders)")}
+    with conn:
+        if "recurrence" not in columns:
+            conn.execute("ALTER TABLE reminders ADD COLUMN recurrence TEXT")
+        conn.execute("DROP TABLE IF EXISTS deliveries")
+
+def add_reminder_to_db(user_id, desc, deadline_ts, recurrence=None):
+    conn = get_connection()
+    with conn:
+        c = conn.execute(SQL_INSERT_REMINDER, (user_id, desc, int(deadline_ts), recurrence))
+    return c.lastrowid
+
+def add_reminders_to_db(user_id, entries):
+    """Insert (description, deadline_ts, recurrence) entries for a user in one transaction.
+
+    Returns the inserted (id, description, deadline, recurrence) rows, in insertion order.
+    """
+    conn = get_connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # The write lock is held, so every row above the current maximum id is one of ours
+        first_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM reminders").fetchone()[0]
+        conn.executemany(
+            SQL_INSERT_REMINDER, ((user_id, desc, int(deadline), recurrence) for desc, deadline, recurrence in entries)
+        )
+        rows = conn.execute(SQL_SELECT_PAGE_AFTER, (user_id, first_id, -1)).fetchall()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return rows
 
 def delete_reminder_from_db(reminder_id):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("DELETE FROM reminders WHERE id = ?", (reminder_id,))
-    conn.commit()
-    conn.close()
+    conn = get_connection()
+    with conn:
+        conn.execute(SQL_DELETE_REMINDER, (reminder_id,))
 
 def delete_all_reminders_for_user(user_id):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("DELETE FROM reminders WHERE user_id = ?", (user_id,))
-    conn.commit()
-    conn.close()
+    conn = get_connection()
+    with conn:
+        conn.execute(SQL_DELETE_USER_REMINDERS, (user_id,))
+
+def count_user_reminders(user_id, limit):
+    # Counting stops at limit, so checking a cap never reads more of the index than that
+    conn = get_connection()
+    return conn.execute(SQL_COUNT_USER_REMINDERS, (user_id, limit)).fetchone()[0]
 
 def get_reminders_by_user(user_id):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT id, description, deadline FROM reminders WHERE user_id = ?", (user_id,))
-    rows = c.fetchall()
-    conn.close()
+    conn = get_connection()
+    return conn.execute(SQL_SELECT_USER_REMINDERS, (user_id,)).fetchall()
+
+def get_reminders_after(user_id, after_id=0, limit=500):
+    conn = get_connection()
+    return conn.execute(SQL_SELECT_PAGE_AFTER, (user_id, after_id, limit)).fetchall()
+
+def get_user_reminder_list(user_id, limit):
+    """All (id, description, deadline, recurrence) rows of a user plus their time zone setting.
+
+    Returns (rows, timezone); rows is None if the user has more than limit reminders.
+    """
+    conn = get_connection()
+    rows = conn.execute(SQL_SELECT_PAGE_AFTER, (user_id, 0, limit + 1)).fetchall()
+    row = conn.execute(SQL_SELECT_TIMEZONE, (user_id,)).fetchone()
+    return (rows if len(rows) <= limit else None), (row[0] if row else None)
+
+def search_words(text):
+    # Lower case without diacritics, as the FTS5 index stores words (remove_diacritics 2)
+    text = (text or "").lower()
+    if not text.isascii():
+        text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    return SEARCH_TERM_RE.findall(text)
+
+def _search_score(description, terms):
+    # Whole-word hits rank above prefix-only hits
+    words = search_words(description)
+    return sum(2 if term in words else 1 for term in terms)
+
+def search_reminders(user_id, query, limit=5, offset=0):
+    """Find a user's reminders containing every word of query, each word also matching as a prefix.
+
+    Results are ranked by whole-word matches, then by deadline. Returns (rows, has_next) with
+    (id, description, deadline, recurrence) rows. Users with long lists go through the FTS5
+    index; shorter lists are scanned here with the same rule, so both find the same rows.
+    """
+    terms = search_words(query)
+    if not terms:
+        return [], False
+    conn = get_connection()
+    if FTS_AVAILABLE and conn.execute(SQL_USER_HAS_MORE_THAN, (user_id, SEARCH_SCAN_MAX_ROWS)).fetchone():
+        match = f'owner : "u{int(user_id)}"' + "".join(f' AND description : "{term}" *' for term in terms)
+        rows = conn.execute(SQL_SEARCH_REMINDERS, (match,)).fetchall()
+    else:
+        rows = []
+        for row in conn.execute(SQL_SELECT_USER_DESCRIPTIONS, (user_id,)):
+            words = search_words(row[1])
+            if all(any(word.startswith(term) for word in words) for term in terms):
+                rows.append(row)
+    rows.sort(key=lambda row: (-_search_score(row[1], terms), row[2] if row[2] is not None else 0, row[0]))
+    return rows[offset:offset + limit], len(rows) > offset + limit
+
+def get_reminders_page(user_id, after_id=0, before_id=None, limit=5):
+    """Keyset-paginated (id, description, deadline) rows for a user, ordered by id.
+
+    Returns (rows, has_prev, has_next). Pass the last id of a page as after_id for the next
+    page, or the first id as before_id for the previous one.
+    """
+    conn = get_connection()
+    if before_id is not None:
+        rows = conn.execute(SQL_SELECT_PAGE_BEFORE, (user_id, before_id, limit + 1)).fetchall()
+        has_prev = len(rows) > limit
+        rows = rows[:limit][::-1]
+        has_next = conn.execute(SQL_EXISTS_AFTER, (user_id, rows[-1][0] if rows else before_id - 1)).fetchone() is not None
+    else:
+        rows = conn.execute(SQL_SELECT_PAGE_AFTER, (user_id, after_id, limit + 1)).fetchall()
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+        has_prev = conn.execute(SQL_EXISTS_BEFORE, (user_id, rows[0][0] if rows else after_id + 1)).fetchone() is not None
+    return rows, has_prev, has_next
+
+def _shard_filter(shards):
+    # shards is (shard_count, owned shard numbers); reminders are partitioned by user_id
+    shard_count, owned = shards
+    return f" AND reminders.user_id % {int(shard_count)} IN ({', '.join(str(int(shard)) for shard in owned)})"
+
+def get_due_reminders(window_start, window_end=None, limit=None, after_id=0, shards=None):
+    """Return (id, user_id, description, deadline, timezone) rows with window_start <= deadline < window_end.
+
+    Rows are ordered by (deadline, id). To read the window in chunks, pass the last row's
+    deadline as window_start and its id as after_id. shards=(count, owned) restricts the rows
+    to the given user_id partitions.
+    """
+    if window_end is None:
+        window_end = 2 ** 63 - 1
+    window_start = int(window_start)
+    sql = SQL_SELECT_DUE_REMINDERS
+    if shards is not None:
+        sql = sql.replace(" ORDER BY", _shard_filter(shards) + " ORDER BY")
+    conn = get_connection()
+    return conn.execute(
+        sql, (window_start, int(window_end), window_start, after_id, -1 if limit is None else limit)
+    ).fetchall()
+
+def get_reminders_created_after(after_id, limit=1000):
+    conn = get_connection()
+    return conn.execute(SQL_SELECT_CREATED_AFTER, (after_id, limit)).fetchall()
+
+def get_max_reminder_id():
+    conn = get_connection()
+    return conn.execute("SELECT COALESCE(MAX(id), 0) FROM reminders").fetchone()[0]
+
+def filter_existing_reminders(reminder_ids):
+    reminder_ids = list(reminder_ids)
+    if not reminder_ids:
+        return set()
+    conn = get_connection()
+    placeholders = ", ".join("?" * len(reminder_ids))
+    rows = conn.execute(f"SELECT id FROM reminders WHERE id IN ({placeholders})", reminder_ids)
+    return {row[0] for row in rows}
+
+def advance_recurring_reminders(reminder_ids, now):
+    """Move recurring reminders whose deadline has passed to their first occurrence after now.
+
+    Returns the (id, user_id, description, deadline, timezone) rows that moved. Occurrences are
+    computed in the owner's time zone. Series that have ended keep their last deadline.
+    """
+    reminder_ids = list(reminder_ids)
+    advanced = []
+    conn = get_connection()
+    for start in range(0, len(reminder_ids), 500):
+        chunk = reminder_ids[start:start + 500]
+        placeholders = ", ".join("?" * len(chunk))
+        rows = conn.execute(
+            f"SELECT id, reminders.user_id, description, deadline, recurrence, timezone FROM reminders "
+            f"LEFT JOIN user_settings ON user_settings.user_id = reminders.user_id "
+            f"WHERE id IN ({placeholders}) AND recurrence IS NOT NULL AND deadline <= ?",
+            chunk + [now],
+        ).fetchall()
+        updates = []
+        for reminder_id, user_id, desc, deadline, recurrence, timezone in rows:
+            try:
+                next_deadline = next_occurrence(recurrence, deadline, now, get_zone(timezone))
+            except ValueError as e:
+                logging.error(f"Invalid recurrence {recurrence!r} on reminder {reminder_id}: {e}")
+                continue
+            if next_deadline is not None:
+                updates.append(((int(next_deadline), reminder_id, deadline), (reminder_id, user_id, desc, int(next_deadline), timezone)))
+        with conn:
+            for params, row in updates:
+                # Compare-and-set: a row another process advanced or deleted meanwhile is left alone
+                if conn.execute(SQL_ADVANCE_RECURRING, params).rowcount:
+                    advanced.append(row)
+    return advanced
+
+def get_stale_recurring_reminders(before):
+    # Recurring reminders whose occurrence passed without being advanced (e.g. while the bot was down)
+    conn = get_connection()
+    rows = conn.execute("SELECT id FROM reminders WHERE recurrence IS NOT NULL AND deadline < ?", (before,))
+    return [row[0] for row in rows]
+
+def get_user_timezone(user_id):
+    conn = get_connection()
+    row = conn.execute(SQL_SELECT_TIMEZONE, (user_id,)).fetchone()
+    return row[0] if row else None
+
+def set_user_timezone(user_id, timezone):
+    conn = get_connection()
+    with conn:
+        conn.execute(SQL_SAVE_TIMEZONE, (user_id, timezone))
+
+def delete_user_settings(user_id):
+    conn = get_connection()
+    with conn:
+        conn.execute(SQL_DELETE_USER_SETTINGS, (user_id,))
+
+def archive_expired_reminders(before, now, limit=500):
+    """Move up to limit reminders with a deadline before `before` into reminders_archive.
+
+    Returns the (id, user_id) pairs moved. The delete triggers drop their deliveries and
+    search index entries.
+    """
+    conn = get_connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        rows = conn.execute(SQL_SELECT_EXPIRED, (int(before), limit)).fetchall()
+        if rows:
+            ids = [row[0] for row in rows]
+            placeholders = ", ".join("?" * len(ids))
+            conn.execute(
+                f"INSERT OR REPLACE INTO reminders_archive (id, user_id, description, deadline, recurrence, archived_at) "
+                f"SELECT id, user_id, description, deadline, recurrence, ? FROM reminders WHERE id IN ({placeholders})",
+                [int(now), *ids],
+            )
+            conn.execute(f"DELETE FROM reminders WHERE id IN ({placeholders})", ids)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
     return rows
+
+def purge_archived_reminders(before, limit=500):
+    conn = get_connection()
+    with conn:
+        return conn.execute(SQL_PURGE_ARCHIVE, (int(before), limit)).rowcount
+
+def delete_archived_reminders_for_user(user_id):
+    conn = get_connection()
+    with conn:
+        conn.execute(SQL_DELETE_USER_ARCHIVE, (user_id,))
+
+def compact_database():
+    """Return free pages to the file system and truncate the WAL.
+
+    Returns (database bytes before, database bytes after).
+    """
+    conn = get_connection()
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    before = conn.execute("PRAGMA page_count").fetchone()[0] * page_size
+    # Each step of this pragma frees one page; executescript runs it to completion
+    conn.executescript("PRAGMA incremental_vacuum;")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    conn.execute("PRAGMA optimize")
+    after = conn.execute("PRAGMA page_count").fetchone()[0] * page_size
+    return before, after
+
+def acquire_shard_lease(shard, owner, now, ttl, resume_from=None, expired_before=None):
+    """Take or renew the lease on a shard if it is ours or expired before expired_before (default now).
+
+    Returns (acquired, previous) where previous is the (owner, expires_at, resume_from)
+    row before the call, or None if the shard was never leased.
+    """
+    conn = get_connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        previous = conn.execute(SQL_SELECT_LEASE, (shard,)).fetchone()
+        c = conn.execute(
+            SQL_ACQUIRE_LEASE, (shard, owner, now + ttl, resume_from, now if expired_before is None else expired_before)
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return c.rowcount == 1, previous
+
+def release_shard_leases(owner):
+    conn = get_connection()
+    with conn:
+        conn.execute(SQL_RELEASE_LEASES, (owner,))
+
+def save_conversation(user_id, state, desc, updated_at):
+    conn = get_connection()
+    with conn:
+        conn.execute(SQL_SAVE_CONVERSATION, (user_id, state, desc, int(updated_at)))
+
+def load_conversation(user_id):
+    conn = get_connection()
+    return conn.execute(SQL_LOAD_CONVERSATION, (user_id,)).fetchone()
+
+def delete_conversation(user_id):
+    conn = get_connection()
+    with conn:
+        conn.execute(SQL_DELETE_CONVERSATION, (user_id,))
+
+def delete_stale_conversations(updated_before):
+    conn = get_connection()
+    with conn:
+        return conn.execute(SQL_DELETE_STALE_CONVERSATIONS, (int(updated_before),)).rowcount
+
+def record_deliveries(rows):
+    """Insert (reminder_id, fire_ts, sent_at) rows in one transaction."""
+    conn = get_connection()
+    with conn:
+        conn.executemany(SQL_RECORD_DELIVERY, rows)
+
+def get_delivered(reminder_ids, since):
+    """The (reminder_id, fire_ts) deliveries recorded for these reminders at or after since."""
+    reminder_ids = list(reminder_ids)
+    if not reminder_ids:
+        return set()
+    conn = get_connection()
+    placeholders = ", ".join("?" * len(reminder_ids))
+    rows = conn.execute(
+        f"SELECT reminder_id, fire_ts FROM deliveries WHERE reminder_id IN ({placeholders}) AND fire_ts >= ?",
+        reminder_ids + [int(since)],
+    )
+    return set(rows)
+
+def prune_deliveries(before, limit=500):
+    # Deliveries are only checked for fires inside the catch-up grace; older ones are dead weight
+    conn = get_connection()
+    with conn:
+        return conn.execute(SQL_PRUNE_DELIVERIES, (int(before), limit)).rowcount
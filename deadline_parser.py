@@ -0,0 +1,227 @@
+import calendar, re
+from datetime import datetime, timedelta, timezone
+from recurrence import WEEKDAYS, first_occurrence
+
+MONTHS = {
+    "januari": 1, "january": 1, "jan": 1,
+    "februari": 2, "february": 2, "feb": 2, "pebruari": 2,
+    "maret": 3, "march": 3, "mar": 3,
+    "april": 4, "apr": 4,
+    "mei": 5, "may": 5,
+    "juni": 6, "june": 6, "jun": 6,
+    "juli": 7, "july": 7, "jul": 7,
+    "agustus": 8, "august": 8, "aug": 8, "agt": 8,
+    "september": 9, "sept": 9, "sep": 9,
+    "oktober": 10, "october": 10, "okt": 10, "oct": 10,
+    "november": 11, "nopember": 11, "nov": 11,
+    "desember": 12, "december": 12, "des": 12, "dec": 12
+}
+
+# Seconds per unit for "in 2 hours" / "dalam 2 jam"
+UNITS = {
+    "minute": 60, "minutes": 60, "min": 60, "mins": 60, "menit": 60,
+    "hour": 3600, "hours": 3600, "jam": 3600,
+    "day": 86400, "days": 86400, "hari": 86400,
+    "week": 604800, "weeks": 604800, "minggu": 604800,
+}
+
+# Days from today for "besok 09:00" / "tomorrow 09:00"
+DAY_WORDS = {
+    "today": 0, "hari ini": 0, "hariini": 0,
+    "tomorrow": 1, "besok": 1,
+    "lusa": 2,
+}
+
+RELATIVE_WORDS = ("in", "dalam")
+
+# "every monday 08:00" / "setiap senin 08:00" start a recurring reminder
+RECURRENCE_WORDS = ("every", "setiap", "tiap")
+WEEKDAY_WORDS = {
+    "monday": 0, "mon": 0, "senin": 0,
+    "tuesday": 1, "tue": 1, "selasa": 1,
+    "wednesday": 2, "wed": 2, "rabu": 2,
+    "thursday": 3, "thu": 3, "kamis": 3,
+    "friday": 4, "fri": 4, "jumat": 4,
+    "saturday": 5, "sat": 5, "sabtu": 5,
+    "sunday": 6, "sun": 6, "minggu": 6,
+}
+DAILY_WORDS = ("day", "hari")
+MONTHLY_WORDS = ("month", "bulan")
+
+TIME_RE = re.compile(r"^(\d{1,2})[:.](\d{2})$")
+YEAR_RE = re.compile(r"^\d{4}$")
+NUMBER_RE = re.compile(r"^\d+$")
+
+FORMAT_HINT = "DD Month HH:MM"
+
+class PastDeadlineError(ValueError):
+    """A one-off deadline that has already passed; the parsed datetime is in ``deadline``."""
+
+    def __init__(self, deadline):
+        super().__init__(f"That deadline has already passed ({deadline:%d %B %Y %H:%M})")
+        self.deadline = deadline
+
+class _TrieNode:
+    __slots__ = ("children", "month", "months")
+
+    def __init__(self):
+        self.children = {}
+        self.month = None
+        self.months = set()
+
+def _build_month_trie():
+    root = _TrieNode()
+    for name, month in MONTHS.items():
+        node = root
+        for char in name:
+            node = node.children.setdefault(char, _TrieNode())
+            node.months.add(month)
+        node.month = month
+    return root
+
+_MONTH_TRIE = _build_month_trie()
+
+def get_month_number(month_text):
+    month_text = month_text.lower().strip(".,")
+    month = MONTHS.get(month_text)
+    if month is not None:
+        return month
+    # Walk the trie: a known name that is a prefix of the text ("septem" -> "sept") wins,
+    # otherwise the text must be a prefix of names that all agree on one month ("agu")
+    node = _MONTH_TRIE
+    matched = None
+    for char in month_text:
+        node = node.children.get(char)
+        if node is None:
+            break
+        if node.month is not None:
+            matched = node.month
+    else:
+        if len(node.months) == 1:
+            return next(iter(node.months))
+    if matched is not None:
+        return matched
+    raise ValueError(f"Bulan '{month_text}' tidak dikenali")
+
+def _parse_time(token):
+    match = TIME_RE.match(token)
+    if match is None:
+        raise ValueError("Time must be in HH:MM format")
+    return int(match.group(1)), int(match.group(2))
+
+def parse_deadline(text, now=None):
+    """Parse a deadline such as "15 April 14:30", "15 April 2027 14:30", "besok 09:00" or "in 2 hours".
+
+    Dates without a year resolve to their next occurrence. The result is in the time zone of
+    now (naive local time if now is naive). Raises ValueError on bad input, and
+    PastDeadlineError if the deadline is not after now ("hari ini 09:00" at 10:00, a past year).
+    """
+    now = now or datetime.now()
+    deadline = _parse_deadline(text, now)
+    if deadline <= now:
+        raise PastDeadlineError(deadline)
+    return deadline
+
+def _parse_deadline(text, now):
+    tz = now.tzinfo
+    parts = text.lower().split()
+    if not parts:
+        raise ValueError(f"Incorrect deadline format. Use: {FORMAT_HINT}")
+
+    if parts[0] in RELATIVE_WORDS:
+        if len(parts) != 3 or not NUMBER_RE.match(parts[1]) or parts[2] not in UNITS:
+            raise ValueError("Relative deadlines look like: in 2 hours")
+        delta = timedelta(seconds=int(parts[1]) * UNITS[parts[2]])
+        if tz is None:
+            return now + delta
+        # Elapsed time, not wall-clock time, so "in 2 hours" stays 2 hours across a DST change
+        return (now.astimezone(timezone.utc) + delta).astimezone(tz)
+
+    day_word = " ".join(parts[:-1])
+    if day_word in DAY_WORDS:
+        hour, minute = _parse_time(parts[-1])
+        day = now + timedelta(days=DAY_WORDS[day_word])
+        return datetime(day.year, day.month, day.day, hour, minute, tzinfo=tz)
+
+    if len(parts) == 4 and YEAR_RE.match(parts[2]):
+        day_str, month_text, year_str, time_token = parts
+        year = int(year_str)
+    elif len(parts) == 3:
+        day_str, month_text, time_token = parts
+        year = None
+    else:
+        raise ValueError(f"Incorrect deadline format. Use: {FORMAT_HINT}")
+    if not NUMBER_RE.match(day_str):
+        raise ValueError(f"Incorrect deadline format. Use: {FORMAT_HINT}")
+    day = int(day_str)
+    month = get_month_number(month_text)
+    hour, minute = _parse_time(time_token)
+    if year is not None:
+        return datetime(year, month, day, hour, minute, tzinfo=tz)
+    deadline = datetime(now.year, month, day, hour, minute, tzinfo=tz)
+    if deadline <= now:
+        deadline = datetime(now.year + 1, month, day, hour, minute, tzinfo=tz)
+    return deadline
+
+def parse_recurrence(text, now=None):
+    """Parse "every day 07:00", "every monday,thursday 08:00" or "every month 15 09:00".
+
+    Returns (first occurrence in the time zone of now, RRULE text). The rule records the time
+    of day, which a stored timestamp alone loses when it falls in a DST gap. Raises ValueError
+    on bad input.
+    """
+    now = now or datetime.now()
+    parts = text.lower().split()
+    if len(parts) not in (3, 4) or parts[0] not in RECURRENCE_WORDS:
+        raise ValueError("Recurring deadlines look like: every monday 08:00")
+    hour, minute = _parse_time(parts[-1])
+    start = datetime(now.year, now.month, now.day, hour, minute, tzinfo=now.tzinfo)
+    if start <= now:
+        start += timedelta(days=1)
+    at = f";BYHOUR={hour};BYMINUTE={minute}"
+    if len(parts) == 3 and parts[1] in DAILY_WORDS:
+        return start, "FREQ=DAILY" + at
+    if len(parts) == 3:
+        try:
+            days = sorted({WEEKDAY_WORDS[day] for day in parts[1].split(",") if day})
+        except KeyError:
+            raise ValueError("Unknown day; use e.g. every monday 08:00 or setiap senin 08:00")
+        rule = "FREQ=WEEKLY;BYDAY=" + ",".join(WEEKDAYS[day] for day in days) + at
+        return first_occurrence(rule, start), rule
+    if parts[1] not in MONTHLY_WORDS or not NUMBER_RE.match(parts[2]) or not 1 <= int(parts[2]) <= 31:
+        raise ValueError("Monthly deadlines look like: every month 15 09:00")
+    day = int(parts[2])
+    year, month = now.year, now.month
+    while True:
+        if day <= calendar.monthrange(year, month)[1]:
+            first = datetime(year, month, day, hour, minute, tzinfo=now.tzinfo)
+            if first > now:
+                return first, "FREQ=MONTHLY" + at
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+def parse_schedule(text, now=None):
+    """Parse a one-off or recurring deadline into (deadline, RRULE text or None)."""
+    if text.split(None, 1)[0].lower() in RECURRENCE_WORDS:
+        return parse_recurrence(text, now)
+    return parse_deadline(text, now), None
+
+def parse_task(text, now=None):
+    """Split "<description> <deadline>" into (description, deadline, recurrence).
+
+    The deadline is the longest trailing group of words that parses, so descriptions may
+    contain numbers and month names. recurrence is None for one-off reminders.
+    """
+    tokens = text.split()
+    error = ValueError("Incorrect format")
+    for size in (4, 3, 2):
+        if len(tokens) <= size:
+            continue
+        try:
+            deadline, rule = parse_schedule(" ".join(tokens[-size:]), now)
+        except ValueError as e:
+            # "passed" beats "bad format" from the shorter groups tried after it
+            if isinstance(e, PastDeadlineError) or (size == 3 and not isinstance(error, PastDeadlineError)):
+                error = e
+            continue
+        return " ".join(tokens[:-size]), deadline, rule
+    raise error
@@ -1,433 +1,697 @@
-import logging, re
-from datetime import datetime, timedelta
+import asyncio, csv, io, logging, math, os, sys, tempfile, time
+from datetime import datetime
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
-from telegram.ext import ContextTypes
-from db import add_reminder_to_db, delete_reminder_from_db, delete_all_reminders_for_user, get_reminders_by_user
-from utils import get_month_number
+from telegram.ext import ApplicationHandlerStop, ContextTypes
+from telegram.helpers import escape_markdown
+from db import (run_db, add_reminder_to_db, add_reminders_to_db, delete_reminder_from_db, delete_all_reminders_for_user,
+                get_reminders_after, get_due_reminders, get_reminders_created_after, get_max_reminder_id,
+                filter_existing_reminders, advance_recurring_reminders, get_stale_recurring_reminders,
+                get_user_timezone, set_user_timezone, delete_user_settings, search_reminders, SEARCH_TERM_RE,
+                archive_expired_reminders, purge_archived_reminders, delete_archived_reminders_for_user, compact_database,
+                count_user_reminders, prune_deliveries)
+from utils import format_deadline, get_zone, resolve_timezone
+from deadline_parser import parse_schedule, parse_task
+from recurrence import describe_rule, next_occurrence
+from reminder_io import CSV_HEADER, parse_import, parse_lines, write_csv
+from state_store import ConversationStore
+from reminder_cache import ReminderCache
+from rate_limiter import UserRateLimiter
+from ledger import DeliveryLedger
+from scheduler import ReminderScheduler, REMINDER_INTERVALS, upcoming_intervals
+from outbox import Outbox, Coalescer, PRIORITY_DEADLINE, PRIORITY_REMINDER
+from metrics import REGISTRY, FIRE_LAG_SECONDS, MAINTENANCE_ROWS, MAINTENANCE_BYTES, timed_handler
+from templates import (DEFAULT_LANGUAGE, TEXTS, KEYBOARDS, INDICATORS, LIST_FOOTER, language_of, button_label,
+                       page_button_labels)
 
-# Global variable to store active job queue entries
-pending_jobs = {}  # key: user_id, value: list of jobs
+# Only reminders firing within this horizon are kept in memory; the rest are loaded on a timer
+REMINDER_HORIZON = float(os.environ.get("REMINDER_HORIZON_HOURS", "6")) * 3600
+REMINDER_TOPUP_INTERVAL = float(os.environ.get("REMINDER_TOPUP_MINUTES", "15")) * 60
+REHYDRATE_CHUNK_SIZE = int(os.environ.get("REHYDRATE_CHUNK_SIZE", "1000"))
+# Reminders for the same chat firing within this many seconds are sent as one digest
+REMINDER_COALESCE_SECONDS = float(os.environ.get("REMINDER_COALESCE_SECONDS", "2"))
+MAX_MESSAGE_LENGTH = 4000
+# Fires missed while the bot was down are still sent if they are at most this old
+DELIVERY_GRACE = float(os.environ.get("DELIVERY_GRACE_MINUTES", "30")) * 60
+REMINDER_PAGE_SIZE = int(os.environ.get("REMINDER_PAGE_SIZE", "5"))
+CONVERSATION_TTL = float(os.environ.get("CONVERSATION_TTL_MINUTES", "60")) * 60
+CONVERSATION_CACHE_SIZE = int(os.environ.get("CONVERSATION_CACHE_SIZE", "10000"))
+IMPORT_MAX_ROWS = int(os.environ.get("IMPORT_MAX_ROWS", "1000"))
+IMPORT_MAX_BYTES = 1024 * 1024
+EXPORT_CHUNK_SIZE = 500
+# Reminders this long past their deadline move to reminders_archive, which keeps them this long
+REMINDER_EXPIRE_AFTER = float(os.environ.get("REMINDER_EXPIRE_HOURS", "24")) * 3600
+REMINDER_ARCHIVE_RETENTION = float(os.environ.get("REMINDER_ARCHIVE_DAYS", "30")) * 86400
+MAINTENANCE_INTERVAL = float(os.environ.get("MAINTENANCE_INTERVAL_MINUTES", "60")) * 60
+MAINTENANCE_BATCH_SIZE = 500
+# The query rides along in the Prev/Next callback data, which Telegram caps at 64 bytes
+SEARCH_QUERY_MAX_BYTES = 40
+REMINDER_CACHE_BYTES = int(float(os.environ.get("REMINDER_CACHE_MB", "16")) * 1024 * 1024)
+REMINDER_CACHE_TTL = float(os.environ.get("REMINDER_CACHE_TTL_SECONDS", "300"))
+# Incoming updates per user; 0 turns the limit off
+RATE_LIMIT_PER_MINUTE = float(os.environ.get("RATE_LIMIT_PER_MINUTE", "30"))
+RATE_LIMIT_BURST = int(os.environ.get("RATE_LIMIT_BURST", "10"))
+# Reminders one user may have stored; 0 means no limit
+MAX_ACTIVE_REMINDERS = int(os.environ.get("MAX_ACTIVE_REMINDERS", "1000"))
+
+# Half-finished add-reminder conversations, kept across restarts
+conversations = ConversationStore(max_entries=CONVERSATION_CACHE_SIZE, ttl=CONVERSATION_TTL)
+# Reminder lists shown by /lihatreminder; every write below invalidates the user's entry
+reminder_cache = ReminderCache(max_bytes=REMINDER_CACHE_BYTES, ttl=REMINDER_CACHE_TTL)
+rate_limiter = UserRateLimiter(RATE_LIMIT_PER_MINUTE / 60, RATE_LIMIT_BURST) if RATE_LIMIT_PER_MINUTE > 0 else None
+
+async def throttle(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # Runs ahead of every other handler; updates from a user over their rate go no further
+    user = update.effective_user
+    if user is None or rate_limiter.allow(user.id):
+        return
+    text = TEXTS[language_of(user)]["rate_limited"] if rate_limiter.should_notify(user.id) else None
+    if update.callback_query is not None:
+        # Every callback query needs an answer, or the button spins until Telegram gives up
+        await update.callback_query.answer(text)
+    elif text is not None and update.effective_message is not None:
+        await update.effective_message.reply_text(text)
+    raise ApplicationHandlerStop
+
+async def reminder_slots(user_id):
+    # How many more reminders the user may add
+    if not MAX_ACTIVE_REMINDERS:
+        return IMPORT_MAX_ROWS
+    return MAX_ACTIVE_REMINDERS - await run_db(count_user_reminders, user_id, MAX_ACTIVE_REMINDERS)
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    help_text = (
-        "🔔 *Reminder Bot* 🔔\n\n"
-        "Welcome! This bot helps you set reminders for your important tasks.\n\n"
-        "⏰ Reminders will be sent: 5d, 3d, 1d, 12h, 6h, 3h, 1h, 30m, exactly at deadline."
-    )
-    keyboard = [
-        [InlineKeyboardButton("➕ Add Reminder", callback_data="add_reminder")],
-        [InlineKeyboardButton("📋 View Reminders", callback_data="list_reminder")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    await update.message.reply_text(help_text, reply_markup=reply_markup, parse_mode='Markdown')
+    lang = language_of(update.effective_user)
+    await update.message.reply_text(TEXTS[lang]["welcome"], reply_markup=KEYBOARDS[lang]["start"], parse_mode='Markdown')
 
+@timed_handler("set_task")
 async def set_task(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    lang = language_of(update.effective_user)
     try:
-        tokens = update.message.text.split()
-        if len(tokens) < 5:
+        tokens = update.message.text.split(None, 1)
+        if len(tokens) < 2:
             raise ValueError("Incorrect format")
-        desc = " ".join(tokens[1:-3])
-        day_str = tokens[-3]
-        month_text = tokens[-2]
-        time_token = tokens[-1]
-        day = int(day_str)
-        month = get_month_number(month_text)
-        if not re.match(r'^\d{1,2}:\d{2}$', time_token):
-            raise ValueError("Time must be in HH:MM format")
-        hour, minute = map(int, time_token.split(':'))
-        current_year = datetime.now().year
-        deadline = datetime(current_year, month, day, hour, minute)
-        if deadline < datetime.now():
-            deadline = datetime(current_year + 1, month, day, hour, minute)
         user_id = update.effective_user.id
-
-        job_list = []
-        reminder_message = ""
+        zone = await user_zone(user_id)
+        desc, deadline, recurrence = parse_task(tokens[1], datetime.now(zone))
+        if await reminder_slots(user_id) < 1:
+            await update.message.reply_text(TEXTS[lang]["reminder_limit"].format(limit=MAX_ACTIVE_REMINDERS))
+            return
+        reminder_id = await run_db(add_reminder_to_db, user_id, desc, deadline.timestamp(), recurrence)
+        reminder_cache.invalidate(user_id)
         if context.job_queue is not None:
-            reminder_intervals = [
-                {"days": 1, "label": "1 day"},
-                {"hours": 5, "label": "5 hours"},
-                {"hours": 3, "label": "3 hours"},
-                {"hours": 1, "label": "1 hour"},
-                {"minutes": 30, "label": "30 minutes"},
-                {"minutes": 15, "label": "15 minutes"}
-            ]
-            active_reminders = []
-            for interval in reminder_intervals:
-                kwargs = {}
-                reminder_label = ""
-                if "days" in interval:
-                    kwargs["days"] = interval["days"]
-                    reminder_label = interval["label"]
-                elif "hours" in interval:
-                    kwargs["hours"] = interval["hours"]
-                    reminder_label = interval["label"]
-                elif "minutes" in interval:
-                    kwargs["minutes"] = interval["minutes"]
-                    reminder_label = interval["label"]
-                delta = timedelta(**kwargs)
-                reminder_time = deadline - delta
-                if reminder_time > datetime.now():
-                    delay = (reminder_time - datetime.now()).total_seconds()
-                    j = context.job_queue.run_once(
-                        send_reminder,
-                        when=delay,
-                        chat_id=update.effective_chat.id,
-                        name=f"{user_id}-{desc}-{reminder_time}",
-                        data={
-                            "desc": desc,
-                            "deadline": deadline.strftime("%d-%B %H:%M"),
-                            "interval": reminder_label,
-                            "deadline_dt": deadline.timestamp()
-                        }
-                    )
-                    job_list.append(j)
-                    active_reminders.append(reminder_label)
-            if active_reminders:
-                reminder_message = f" Reminders will be sent {', '.join(active_reminders)} before the deadline."
-            else:
-                reminder_message = " (Deadline is too close for reminders)"
-        else:
-            reminder_message = " (Reminders are not active)"
-        reminder_id = add_reminder_to_db(user_id, desc, deadline.strftime("%d-%B %H:%M"))
-        if user_id in pending_jobs:
-            pending_jobs[user_id].extend(job_list)
-        else:
-            pending_jobs[user_id] = job_list
-
-        keyboard = [
-            [InlineKeyboardButton("Add Reminder", callback_data="add_reminder")],
-            [InlineKeyboardButton("List Reminder", callback_data="list_reminder")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        short_message = "✅ Reminder Saved!"
-        await update.message.reply_text(short_message, parse_mode='Markdown')
+            schedule_new_reminder(reminder_id, user_id, update.effective_chat.id, desc, deadline.timestamp(), zone)
+        await update.message.reply_text(saved_message(lang, recurrence), parse_mode='Markdown')
     except ValueError as e:
-        await update.message.reply_text(
-            f"Error: {str(e)}\nFormat: <description> DD Month HH:MM\nExample: Statistics 12 March 17:00"
-        )
+        await update.message.reply_text(TEXTS[lang]["set_task_error"].format(error=e))
     except Exception as e:
         logging.error(f"Error in set_task: {e}")
-        await update.message.reply_text("Something went wrong. Please verify your input format: <description> DD Month HH:MM")
-
-async def send_reminder(context: ContextTypes.DEFAULT_TYPE):
-    data = context.job.data
-    if isinstance(data, dict):
-        desc = data["desc"]
-        deadline = data["deadline"]
-        indicator = "Deadline reached" if data["interval"] == "Deadline" else f"{data['interval']} before the deadline"
-        message = (
-            f"🔔 *REMINDER!*\n\n"
-            f"📝 *{desc}*\n"
-            f"⏰ Deadline: {deadline}\n"
-            f"⚠️ {indicator}"
-        )
-        await context.bot.send_message(
-            chat_id=context.job.chat_id,
-            text=message,
-            parse_mode='Markdown'
-        )
-    else:
-        await context.bot.send_message(
-            chat_id=context.job.chat_id,
-            text=f"🔔 Reminder: {data}"
-        )
+        await update.message.reply_text(TEXTS[lang]["set_task_failed"])
+
+async def user_zone(user_id):
+    # The user's /timezone setting, else BOT_TIMEZONE; None means server local time
+    name = reminder_cache.cached_timezone(user_id)
+    if name is False:
+        name = await run_db(get_user_timezone, user_id)
+    return get_zone(name)
+
+def saved_message(lang, recurrence):
+    if recurrence:
+        return TEXTS[lang]["saved_recurring"].format(rule=describe_rule(recurrence))
+    return TEXTS[lang]["saved"]
+
+def format_reminder(data, lang=DEFAULT_LANGUAGE):
+    return TEXTS[lang]["reminder"].format(
+        desc=escape_markdown(data["desc"]), deadline=data["deadline"], indicator=INDICATORS[lang][data["interval"]]
+    )
+
+def format_reminder_digest(items, lang=DEFAULT_LANGUAGE):
+    # Several reminders at once: one section per reminder, split if Telegram's size limit is hit.
+    # Returns (text, items in that text) pairs.
+    messages = []
+    header = TEXTS[lang]["digest_header"].format(count=len(items))
+    section_format, indicators = TEXTS[lang]["digest_section"], INDICATORS[lang]
+    text, included = header, []
+    for data in sorted(items, key=lambda d: d["deadline_dt"]):
+        section = section_format.format(desc=escape_markdown(data["desc"]), deadline=data["deadline"], indicator=indicators[data["interval"]])
+        if len(text) + len(section) > MAX_MESSAGE_LENGTH and included:
+            messages.append((text, included))
+            text, included = header, []
+        text += section
+        included.append(data)
+    messages.append((text, included))
+    return messages
+
+def flush_reminders(chat_id, items):
+    priority = PRIORITY_DEADLINE if any(d["interval"] == "Deadline" for d in items) else PRIORITY_REMINDER
+    messages = [(format_reminder(items[0]), items)] if len(items) == 1 else format_reminder_digest(items)
+    for text, included in messages:
+        outbox.send(chat_id, text, priority=priority, tag=included, parse_mode='Markdown')
+
+def record_sent(items):
+    now = time.time()
+    for data in items:
+        FIRE_LAG_SECONDS.observe(max(0.0, now - data["fire_ts"]))
+    delivery_ledger.record((data["reminder_id"], data["fire_ts"]) for data in items)
+    if delivery_ledger.needs_flush:
+        asyncio.get_running_loop().create_task(delivery_ledger.flush())
+
+async def send_reminders(context: ContextTypes.DEFAULT_TYPE, batch):
+    if shards is not None:
+        # Only send for shards still held, and skip reminders another process deleted
+        batch = [(chat_id, data) for chat_id, data in batch if shards.owns(data["user_id"])]
+        existing = await run_db(filter_existing_reminders, {data["reminder_id"] for _, data in batch})
+        batch = [(chat_id, data) for chat_id, data in batch if data["reminder_id"] in existing]
+    batch = await delivery_ledger.undelivered(batch)
+    for chat_id, data in batch:
+        coalescer.add(chat_id, data)
+    finished = {data["reminder_id"]: chat_id for chat_id, data in batch if data["interval"] == "Deadline"}
+    if finished:
+        await advance_recurring(finished)
+
+async def advance_recurring(chats):
+    # Recurring reminders keep one row: its deadline moves to the next occurrence, which is scheduled.
+    # chats maps each reminder id to the chat it fired in; None means the owner's private chat.
+    loaded_at = reminder_scheduler.begin_load()
+    rows = await run_db(advance_recurring_reminders, chats, time.time())
+    for reminder_id, user_id, desc, deadline, timezone in rows:
+        reminder_cache.invalidate(user_id)
+        if shards is None or shards.owns(user_id):
+            reminder_scheduler.schedule(
+                reminder_id, user_id, chats[reminder_id] or user_id, desc, deadline, until=reminder_scheduler.horizon_end, loaded_at=loaded_at,
+                tz=get_zone(timezone)
+            )
+
+# Rate-limited queue for every reminder notification; sent fires go to the delivery ledger
+delivery_ledger = DeliveryLedger()
+outbox = Outbox(on_sent=record_sent)
+coalescer = Coalescer(flush_reminders, window=REMINDER_COALESCE_SECONDS)
+
+# Single scheduler holding every pending reminder fire
+reminder_scheduler = ReminderScheduler(send_reminders)
+
+# ShardLeases when several processes share the database (see enable_sharding), else None
+shards = None
+SHARD_POLL_INTERVAL = float(os.environ.get("SHARD_POLL_SECONDS", "5"))
+_last_seen_reminder_id = 0
+
+REGISTRY.gauge("bot_scheduler_queued_fires", "Reminder fires waiting in the scheduler heap", lambda: len(reminder_scheduler))
+REGISTRY.gauge("bot_coalescer_pending", "Fired reminders waiting to be merged into a digest", lambda: len(coalescer))
+REGISTRY.gauge("bot_outbox_queue_depth", "Messages waiting in the outbox", lambda: len(outbox))
+REGISTRY.gauge("bot_outbox_in_flight", "Messages being sent right now", lambda: outbox.stats()["in_flight"])
+REGISTRY.gauge("bot_outbox_sent_total", "Messages delivered by the outbox", lambda: outbox.sent, kind="counter")
+REGISTRY.gauge("bot_outbox_failed_total", "Messages the outbox gave up on", lambda: outbox.failed, kind="counter")
+REGISTRY.gauge("bot_outbox_retried_total", "Send attempts retried after a flood limit or network error", lambda: outbox.retried, kind="counter")
+REGISTRY.gauge("bot_reminder_cache_hits_total", "Reminder list pages served from the cache", lambda: reminder_cache.hits, kind="counter")
+REGISTRY.gauge("bot_reminder_cache_misses_total", "Reminder list pages that read the database", lambda: reminder_cache.misses, kind="counter")
+REGISTRY.gauge("bot_reminder_cache_bytes", "Estimated memory held by the reminder list cache", lambda: reminder_cache.bytes)
+REGISTRY.gauge("bot_rate_limited_total", "Updates dropped because their user was over the rate limit",
+               lambda: rate_limiter.rejected if rate_limiter is not None else 0, kind="counter")
+REGISTRY.gauge("bot_rate_limiter_users", "Users with a rate limit bucket in memory",
+               lambda: len(rate_limiter) if rate_limiter is not None else 0)
+REGISTRY.gauge("bot_delivery_ledger_unflushed", "Sent reminders not yet written to the deliveries table", lambda: len(delivery_ledger))
+
+def enable_sharding(shard_leases):
+    global shards
+    shards = shard_leases
+
+def schedule_new_reminder(reminder_id, user_id, chat_id, desc, deadline_ts, tz=None):
+    if shards is not None and not shards.owns(user_id):
+        # The process owning this user's shard picks the new row up from the database
+        return upcoming_intervals(deadline_ts)
+    return reminder_scheduler.schedule(reminder_id, user_id, chat_id, desc, deadline_ts, tz=tz)
+
+def cancel_reminder(reminder_id):
+    reminder_scheduler.cancel(reminder_id)
+    coalescer.discard(lambda data: data["reminder_id"] == reminder_id)
+
+def cancel_user_reminders(user_id):
+    reminder_scheduler.cancel_user(user_id)
+    coalescer.discard(lambda data: data["user_id"] == user_id)
 
 async def selesai(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    lang = language_of(update.effective_user)
     user_id = update.effective_user.id
-    if user_id in pending_jobs:
-        for job in pending_jobs[user_id]:
-            job.schedule_removal()
-        del pending_jobs[user_id]
-    delete_all_reminders_for_user(user_id)
-    keyboard = [
-        [InlineKeyboardButton("➕ Add New Reminder", callback_data="add_reminder")],
-        [InlineKeyboardButton("🏠 Main Menu", callback_data="home")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    await update.message.reply_text("✅ All reminders have been completed!", reply_markup=reply_markup)
+    await run_db(delete_all_reminders_for_user, user_id)
+    reminder_cache.invalidate(user_id)
+    cancel_user_reminders(user_id)
+    await update.message.reply_text(TEXTS[lang]["all_done"], reply_markup=KEYBOARDS[lang]["all_done"])
 
 async def add_tugas(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    message = (
-        "🔸 *Reminder Input Format*\n\n"
-        "Format: DD Month HH:MM\n"
-        "Example: 15 April 14:30\n\n"
-        "Month can be written in full or abbreviated."
-    )
-    await update.message.reply_text(message, parse_mode='Markdown')
+    lang = language_of(update.effective_user)
+    await update.message.reply_text(TEXTS[lang]["input_format"], parse_mode='Markdown')
+
+async def render_reminder_page(user_id, after_id=0, before_id=None, status="", lang=DEFAULT_LANGUAGE):
+    rows, has_prev, has_next = await reminder_cache.page(user_id, after_id, before_id, REMINDER_PAGE_SIZE)
+    if not rows and after_id:
+        # The page emptied (e.g. its last reminder was deleted): fall back to the previous one
+        rows, has_prev, has_next = await reminder_cache.page(user_id, 0, after_id + 1, REMINDER_PAGE_SIZE)
+    if not rows:
+        return status + TEXTS[lang]["list_empty"], KEYBOARDS[lang]["list_empty"]
+    zone = await user_zone(user_id)
+    # Done/Delete carry the page anchor so the same page can be re-rendered afterwards
+    anchor = rows[0][0] - 1
+    item_format = TEXTS[lang]["list_item"]
+    lines = [status + TEXTS[lang]["list_title"]]
+    keyboard = []
+    for number, (reminder_id, desc, deadline, recurrence) in enumerate(rows, 1):
+        line = item_format.format(number=number, desc=escape_markdown(desc), deadline=format_deadline(deadline, zone))
+        if recurrence:
+            line += f"\n🔁 {describe_rule(recurrence)}"
+        lines.append(line)
+        done_label, delete_label = page_button_labels(lang, number)
+        keyboard.append((
+            InlineKeyboardButton(done_label, callback_data=f"done_{reminder_id}_{anchor}"),
+            InlineKeyboardButton(delete_label, callback_data=f"delete_{reminder_id}_{anchor}")
+        ))
+    navigation = []
+    if has_prev:
+        navigation.append(InlineKeyboardButton(button_label(lang, "prev"), callback_data=f"page_before_{rows[0][0]}"))
+    if has_next:
+        navigation.append(InlineKeyboardButton(button_label(lang, "next"), callback_data=f"page_after_{rows[-1][0]}"))
+    if navigation:
+        keyboard.append(navigation)
+    keyboard.append(LIST_FOOTER[lang])
+    return "\n\n".join(lines), InlineKeyboardMarkup(keyboard)
+
+def normalise_search_query(text):
+    # The words searched for, cut at a word boundary so paging repeats exactly the same search
+    query = ""
+    for term in SEARCH_TERM_RE.findall(text.lower()):
+        candidate = f"{query} {term}".strip()
+        if len(candidate.encode("utf-8")) > SEARCH_QUERY_MAX_BYTES:
+            if not query:
+                # One very long word: its start still works, since words match as prefixes
+                query = candidate.encode("utf-8")[:SEARCH_QUERY_MAX_BYTES].decode("utf-8", errors="ignore")
+            break
+        query = candidate
+    return query
+
+async def render_search_page(user_id, query, offset=0, lang=DEFAULT_LANGUAGE):
+    rows, has_next = await run_db(search_reminders, user_id, query, REMINDER_PAGE_SIZE, offset)
+    if not rows:
+        return TEXTS[lang]["search_empty"].format(query=escape_markdown(query)), KEYBOARDS[lang]["list_empty"]
+    zone = await user_zone(user_id)
+    item_format = TEXTS[lang]["list_item"]
+    lines = [TEXTS[lang]["search_title"].format(query=escape_markdown(query))]
+    for number, (reminder_id, desc, deadline, recurrence) in enumerate(rows, offset + 1):
+        line = item_format.format(number=number, desc=escape_markdown(desc), deadline=format_deadline(deadline, zone))
+        if recurrence:
+            line += f"\n🔁 {describe_rule(recurrence)}"
+        lines.append(line)
+    navigation = []
+    if offset:
+        previous = max(0, offset - REMINDER_PAGE_SIZE)
+        navigation.append(InlineKeyboardButton(button_label(lang, "prev"), callback_data=f"cari_{previous}_{query}"))
+    if has_next:
+        navigation.append(
+            InlineKeyboardButton(button_label(lang, "next"), callback_data=f"cari_{offset + REMINDER_PAGE_SIZE}_{query}")
+        )
+    keyboard = [navigation, LIST_FOOTER[lang]] if navigation else [LIST_FOOTER[lang]]
+    return "\n\n".join(lines), InlineKeyboardMarkup(keyboard)
+
+@timed_handler("search_command")
+async def search_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    lang = language_of(update.effective_user)
+    tokens = update.message.text.split(None, 1)
+    query = normalise_search_query(tokens[1]) if len(tokens) > 1 else ""
+    if not query:
+        await update.message.reply_text(TEXTS[lang]["search_usage"])
+        return
+    text, reply_markup = await render_search_page(update.effective_user.id, query, lang=lang)
+    await update.message.reply_text(text, reply_markup=reply_markup, parse_mode='Markdown')
 
+@timed_handler("lihat_tugas")
 async def lihat_tugas(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    reminders = get_reminders_by_user(user_id)
-    msg = update.effective_message
-    if reminders:
-        await msg.reply_text("📋 *Your Reminders List*", parse_mode='Markdown')
-        for (reminder_id, desc, deadline) in reminders:
-            keyboard = [
-                [InlineKeyboardButton("✅ Done", callback_data=f"done_{reminder_id}")],
-                [InlineKeyboardButton("🗑️ Delete", callback_data=f"delete_{reminder_id}")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            reminder_message = f"🔹 *{desc}*\n📅 Deadline: {deadline}"
-            await msg.reply_text(reminder_message, reply_markup=reply_markup, parse_mode='Markdown')
-        keyboard = [
-            [InlineKeyboardButton("➕ Add Reminder", callback_data="add_reminder")],
-            [InlineKeyboardButton("🏠 Home", callback_data="home")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await msg.reply_text("What would you like to do next?", reply_markup=reply_markup)
-    else:
-        keyboard = [
-            [InlineKeyboardButton("➕ Add Reminder", callback_data="add_reminder")],
-            [InlineKeyboardButton("🏠 Home", callback_data="home")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await msg.reply_text("📭 *No Reminders Found*\n\nYou don't have any saved reminders yet.", reply_markup=reply_markup, parse_mode='Markdown')
+    text, reply_markup = await render_reminder_page(user_id, lang=language_of(update.effective_user))
+    await update.effective_message.reply_text(text, reply_markup=reply_markup, parse_mode='Markdown')
 
+@timed_handler("button_callback")
 async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
+    lang = language_of(query.from_user)
     if query.data == "add_reminder":
         user_id = query.from_user.id
-        context.user_data['state'] = {'state': 'waiting_for_desc'}
-        cancel_message = (
-            "📝 Please enter the reminder description.\n\n"
-            "Example: Finish math homework\n\n"
-            "Type /cancel to abort."
-        )
-        await query.message.reply_text(cancel_message, parse_mode='Markdown')
+        await conversations.set(user_id, {'state': 'waiting_for_desc'})
+        await query.message.reply_text(TEXTS[lang]["ask_description"], parse_mode='Markdown')
     elif query.data == "home":
-        help_text = "🔔 *Reminder Bot* 🔔\n\nWhat would you like to do?"
-        keyboard = [
-            [InlineKeyboardButton("➕ Add Reminder", callback_data="add_reminder")],
-            [InlineKeyboardButton("📋 View Reminders", callback_data="list_reminder")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await query.message.reply_text(help_text, reply_markup=reply_markup, parse_mode='Markdown')
+        await query.message.reply_text(TEXTS[lang]["home"], reply_markup=KEYBOARDS[lang]["start"], parse_mode='Markdown')
     elif query.data == "list_reminder":
         await lihat_tugas(update, context)
-    elif query.data.startswith("done_"):
-        reminder_id = int(query.data.split("_")[1])
-        delete_reminder_from_db(reminder_id)
-        await query.edit_message_text(
-            f"✅ *DONE*\n\n{query.message.text}",
-            parse_mode='Markdown'
+    elif query.data.startswith("page_after_"):
+        text, reply_markup = await render_reminder_page(
+            query.from_user.id, after_id=int(query.data.split("_")[2]), lang=lang
         )
-    elif query.data.startswith("delete_"):
-        reminder_id = int(query.data.split("_")[1])
-        delete_reminder_from_db(reminder_id)
-        await query.edit_message_text(
-            f"🗑️ *DELETED*\n\nReminder deleted.",
-            parse_mode='Markdown'
+        await query.edit_message_text(text, reply_markup=reply_markup, parse_mode='Markdown')
+    elif query.data.startswith("cari_"):
+        _, offset, search = query.data.split("_", 2)
+        text, reply_markup = await render_search_page(query.from_user.id, search, int(offset), lang=lang)
+        await query.edit_message_text(text, reply_markup=reply_markup, parse_mode='Markdown')
+    elif query.data.startswith("page_before_"):
+        text, reply_markup = await render_reminder_page(
+            query.from_user.id, before_id=int(query.data.split("_")[2]), lang=lang
         )
+        await query.edit_message_text(text, reply_markup=reply_markup, parse_mode='Markdown')
+    elif query.data.startswith("done_") or query.data.startswith("delete_"):
+        action, reminder_id, *anchor = query.data.split("_")
+        await run_db(delete_reminder_from_db, int(reminder_id))
+        reminder_cache.invalidate(query.from_user.id)
+        cancel_reminder(int(reminder_id))
+        if anchor:
+            status = TEXTS[lang]["status_done"] if action == "done" else TEXTS[lang]["status_deleted"]
+            text, reply_markup = await render_reminder_page(
+                query.from_user.id, after_id=int(anchor[0]), status=status, lang=lang
+            )
+            await query.edit_message_text(text, reply_markup=reply_markup, parse_mode='Markdown')
+        elif action == "done":
+            # Buttons on list messages sent before pagination
+            await query.edit_message_text(TEXTS[lang]["marked_done"].format(text=query.message.text), parse_mode='Markdown')
+        else:
+            await query.edit_message_text(TEXTS[lang]["marked_deleted"], parse_mode='Markdown')
 
+@timed_handler("text_handler")
 async def text_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    if 'state' not in context.user_data:
+    state = await conversations.get(user_id)
+    if state is None:
         return
-    state = context.user_data['state']
-    if state['state'] == 'waiting_for_desc':
-        state['desc'] = update.message.text
-        state['state'] = 'waiting_for_deadline'
-        deadline_message = ("📅 *Enter the Deadline*\n\nFormat: DD Month HH:MM\nExample: 15 April 14:30\n\nType /cancel to abort.")
-        await update.message.reply_text(deadline_message, parse_mode='Markdown')
+    lang = language_of(update.effective_user)
+    if state['state'] == 'waiting_for_import':
+        zone = await user_zone(user_id)
+        entries, errors = parse_lines(update.message.text, datetime.now(zone))
+        await conversations.clear(user_id)
+        await finish_import(update, context, entries, errors, zone)
+    elif state['state'] == 'waiting_for_desc':
+        await conversations.set(user_id, {'state': 'waiting_for_deadline', 'desc': update.message.text})
+        await update.message.reply_text(TEXTS[lang]["ask_deadline"], parse_mode='Markdown')
     elif state['state'] == 'waiting_for_deadline':
         try:
-            deadline_text = update.message.text
-            parts = deadline_text.split()
-            if len(parts) != 3:
-                raise ValueError("Incorrect deadline format. Use: DD Month HH:MM")
-            day_str, month_text, time_token = parts
-            day = int(day_str)
-            month = get_month_number(month_text)
-            if not re.match(r'^\d{1,2}:\d{2}$', time_token):
-                raise ValueError("Time must be in HH:MM format")
-            hour, minute = map(int, time_token.split(':'))
-            current_year = datetime.now().year
-            deadline = datetime(current_year, month, day, hour, minute)
-            if deadline < datetime.now():
-                deadline = datetime(current_year + 1, month, day, hour, minute)
+            zone = await user_zone(user_id)
+            deadline, recurrence = parse_schedule(update.message.text, datetime.now(zone))
             desc = state['desc']
-            job_list = []
-            reminder_message = ""
+            if await reminder_slots(user_id) < 1:
+                await update.message.reply_text(TEXTS[lang]["reminder_limit"].format(limit=MAX_ACTIVE_REMINDERS))
+                await conversations.clear(user_id)
+                return
+            reminder_id = await run_db(add_reminder_to_db, user_id, desc, deadline.timestamp(), recurrence)
+            reminder_cache.invalidate(user_id)
             if context.job_queue is not None:
-                reminder_intervals = [
-                    {"days": 5, "label": "5 days"},
-                    {"days": 3, "label": "3 days"},
-                    {"days": 1, "label": "1 day"},
-                    {"hours": 12, "label": "12 hours"},
-                    {"hours": 6, "label": "6 hours"},
-                    {"hours": 3, "label": "3 hours"},
-                    {"hours": 1, "label": "1 hour"},
-                    {"minutes": 30, "label": "30 minutes"},
-                    {"minutes": 0, "label": "Deadline"}
-                ]
-                active_reminders = []
-                for interval in reminder_intervals:
-                    kwargs = {}
-                    reminder_label = ""
-                    if "days" in interval:
-                        kwargs["days"] = interval["days"]
-                        reminder_label = interval["label"]
-                    elif "hours" in interval:
-                        kwargs["hours"] = interval["hours"]
-                        reminder_label = interval["label"]
-                    elif "minutes" in interval:
-                        kwargs["minutes"] = interval["minutes"]
-                        reminder_label = interval["label"]
-                    delta = timedelta(**kwargs)
-                    reminder_time = deadline - delta
-                    if reminder_time > datetime.now():
-                        delay = (reminder_time - datetime.now()).total_seconds()
-                        j = context.job_queue.run_once(
-                            send_reminder,
-                            when=delay,
-                            chat_id=update.effective_chat.id,
-                            name=f"{user_id}-{desc}-{reminder_time}",
-                            data={
-                                "desc": desc,
-                                "deadline": deadline.strftime("%d-%B %H:%M"),
-                                "interval": reminder_label,
-                                "deadline_dt": deadline.timestamp()
-                            }
-                        )
-                        job_list.append(j)
-                        active_reminders.append(reminder_label)
-                if active_reminders:
-                    formatted_intervals = []
-                    for r in active_reminders:
-                        if r == "Deadline":
-                            formatted_intervals.append("Exactly at the deadline")
-                        else:
-                            formatted_intervals.append(f"{r} before the deadline")
-                    reminder_message = "⏰ Reminders will be sent:\n• " + "\n• ".join(formatted_intervals)
-                else:
-                    reminder_message = "⚠️ Deadline is too close for reminders"
-            else:
-                reminder_message = " (Reminders are not active: job-queue feature unavailable)"
-            
-            reminder_id = add_reminder_to_db(user_id, desc, deadline.strftime("%d-%B %H:%M"))
-            if user_id in pending_jobs:
-                pending_jobs[user_id].extend(job_list)
-            else:
-                pending_jobs[user_id] = job_list
-
-            keyboard = [
-                [InlineKeyboardButton("➕ Add Another Reminder", callback_data="add_reminder")],
-                [InlineKeyboardButton("📋 View All Reminders", callback_data="list_reminder")],
-                [InlineKeyboardButton("🏠 Main Menu", callback_data="home")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            short_message = "✅ Reminder Saved!"
-            await update.message.reply_text(short_message, reply_markup=reply_markup, parse_mode='Markdown')
-            del context.user_data['state']
-        except ValueError as e:
-            error_message = (
-                f"❌ *Error:* {str(e)}\n\n"
-                f"Use format: DD Month HH:MM\nExample: 1 April 17:00\n\nType /cancel to abort."
+                schedule_new_reminder(reminder_id, user_id, update.effective_chat.id, desc, deadline.timestamp(), zone)
+            await update.message.reply_text(
+                saved_message(lang, recurrence), reply_markup=KEYBOARDS[lang]["saved"], parse_mode='Markdown'
             )
-            await update.message.reply_text(error_message, parse_mode='Markdown')
+            await conversations.clear(user_id)
+        except ValueError as e:
+            await update.message.reply_text(TEXTS[lang]["deadline_error"].format(error=e), parse_mode='Markdown')
         except Exception as e:
             logging.error(f"Error in text_handler: {e}")
-            await update.message.reply_text("Something went wrong. Try again with format DD Month HH:MM")
-            del context.user_data['state']
+            await update.message.reply_text(TEXTS[lang]["deadline_failed"])
+            await conversations.clear(user_id)
+
+async def finish_import(update: Update, context: ContextTypes.DEFAULT_TYPE, entries, errors, zone=None):
+    lang = language_of(update.effective_user)
+    user_id = update.effective_user.id
+    now = time.time()
+    upcoming = []
+    for desc, deadline, recurrence in entries:
+        if recurrence and deadline <= now:
+            # Recurring entries start from their next occurrence instead of being skipped
+            deadline = next_occurrence(recurrence, deadline, now, zone)
+        if deadline is not None and deadline > now:
+            upcoming.append((desc, deadline, recurrence))
+    if len(upcoming) > IMPORT_MAX_ROWS:
+        await update.message.reply_text(TEXTS[lang]["import_too_many"].format(limit=IMPORT_MAX_ROWS))
+        return
+    remaining = await reminder_slots(user_id) if upcoming else 0
+    if len(upcoming) > remaining:
+        await update.message.reply_text(
+            TEXTS[lang]["import_over_limit"].format(limit=MAX_ACTIVE_REMINDERS, remaining=max(remaining, 0))
+        )
+        return
+    rows = await run_db(add_reminders_to_db, user_id, upcoming) if upcoming else []
+    reminder_cache.invalidate(user_id)
+    if context.job_queue is not None:
+        for reminder_id, desc, deadline, _ in rows:
+            schedule_new_reminder(reminder_id, user_id, update.effective_chat.id, desc, deadline, zone)
+    lines = [TEXTS[lang]["imported"].format(count=len(rows))]
+    if len(entries) > len(upcoming):
+        lines.append(TEXTS[lang]["import_skipped"].format(count=len(entries) - len(upcoming)))
+    if errors:
+        lines.append(TEXTS[lang]["import_errors"].format(count=len(errors)))
+        lines.extend(TEXTS[lang]["import_error_line"].format(line=line_no, error=error) for line_no, error in errors[:10])
+    await update.message.reply_text("\n".join(lines))
+
+@timed_handler("import_command")
+async def import_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    tokens = update.message.text.split(None, 1)
+    if len(tokens) < 2:
+        await conversations.set(update.effective_user.id, {'state': 'waiting_for_import'})
+        await update.message.reply_text(TEXTS[language_of(update.effective_user)]["import_prompt"])
+        return
+    zone = await user_zone(update.effective_user.id)
+    entries, errors = parse_import(tokens[1], now=datetime.now(zone))
+    await finish_import(update, context, entries, errors, zone)
+
+@timed_handler("import_document")
+async def import_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    lang = language_of(update.effective_user)
+    user_id = update.effective_user.id
+    document = update.message.document
+    if not (update.message.caption or "").startswith("/import"):
+        state = await conversations.get(user_id)
+        if state is None or state['state'] != 'waiting_for_import':
+            return
+    await conversations.clear(user_id)
+    if document.file_size and document.file_size > IMPORT_MAX_BYTES:
+        await update.message.reply_text(TEXTS[lang]["import_too_large"].format(limit=IMPORT_MAX_BYTES // 1024))
+        return
+    try:
+        data = await (await document.get_file()).download_as_bytearray()
+    except Exception as e:
+        logging.error(f"Error downloading import file: {e}")
+        await update.message.reply_text(TEXTS[lang]["import_download_failed"])
+        return
+    zone = await user_zone(user_id)
+    entries, errors = parse_import(bytes(data).decode("utf-8-sig", errors="replace"), document.file_name, datetime.now(zone))
+    await finish_import(update, context, entries, errors, zone)
+
+@timed_handler("export_command")
+async def export_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    lang = language_of(update.effective_user)
+    user_id = update.effective_user.id
+    zone = await user_zone(user_id)
+    # Rows are read in keyset chunks and spooled to disk past 1 MB, never held all at once
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as out:
+        after_id, count = 0, 0
+        chunk = io.StringIO()
+        csv.writer(chunk).writerow(CSV_HEADER)
+        while True:
+            rows = await run_db(get_reminders_after, user_id, after_id, EXPORT_CHUNK_SIZE)
+            write_csv(chunk, (row[1:] for row in rows), zone)
+            out.write(chunk.getvalue().encode("utf-8"))
+            chunk.seek(0)
+            chunk.truncate()
+            count += len(rows)
+            if len(rows) < EXPORT_CHUNK_SIZE:
+                break
+            after_id = rows[-1][0]
+        if not count:
+            await update.message.reply_text(TEXTS[lang]["export_empty"])
+            return
+        out.seek(0)
+        await update.message.reply_document(
+            document=out, filename="reminders.csv", caption=TEXTS[lang]["export_caption"].format(count=count)
+        )
 
 async def help_commands(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    help_text = (
-        "🔔 *Reminder Bot - Help* 🔔\n\n"
-        "*List of Commands:*\n"
-        "• /start - Start the bot\n"
-        "• /help - Show this guide\n\n"
-        "Use the buttons below for quick navigation:"
-    )
-    keyboard = [
-        [InlineKeyboardButton("➕ Add Reminder", callback_data="add_reminder")],
-        [InlineKeyboardButton("📋 View Reminders", callback_data="list_reminder")],
-        [InlineKeyboardButton("🏠 Main Menu", callback_data="home")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    await update.message.reply_text(help_text, reply_markup=reply_markup, parse_mode='Markdown')
+    lang = language_of(update.effective_user)
+    await update.message.reply_text(TEXTS[lang]["help"], reply_markup=KEYBOARDS[lang]["help"], parse_mode='Markdown')
+
+@timed_handler("timezone_command")
+async def timezone_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    lang = language_of(update.effective_user)
+    user_id = update.effective_user.id
+    tokens = update.message.text.split(None, 1)
+    if len(tokens) < 2:
+        name = await run_db(get_user_timezone, user_id)
+        zone = get_zone(name)
+        label = getattr(zone, "key", None) or TEXTS[lang]["server_time"]
+        now = datetime.now(zone).strftime("%H:%M")
+        await update.message.reply_text(TEXTS[lang]["timezone_current"].format(zone=label, now=now))
+        return
+    try:
+        name = resolve_timezone(tokens[1])
+    except ValueError:
+        await update.message.reply_text(TEXTS[lang]["timezone_unknown"].format(zone=tokens[1].strip()))
+        return
+    await run_db(set_user_timezone, user_id, name)
+    reminder_cache.invalidate(user_id)
+    # Fire times do not move; only how pending reminders show their deadline
+    reminder_scheduler.set_user_timezone(user_id, get_zone(name))
+    now = datetime.now(get_zone(name)).strftime("%H:%M")
+    await update.message.reply_text(TEXTS[lang]["timezone_set"].format(zone=name, now=now))
 
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if 'state' in context.user_data:
-        del context.user_data['state']
-    await update.message.reply_text("❌ Operation cancelled.", parse_mode='Markdown')
+    await conversations.clear(update.effective_user.id)
+    await update.message.reply_text(TEXTS[language_of(update.effective_user)]["cancelled"], parse_mode='Markdown')
 
 async def stop(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    if user_id in pending_jobs:
-        for job in pending_jobs[user_id]:
-            job.schedule_removal()
-        del pending_jobs[user_id]
-    delete_all_reminders_for_user(user_id)
-    await update.message.reply_text("❌ All your data has been removed from this bot.", parse_mode='Markdown')
+    await run_db(delete_all_reminders_for_user, user_id)
+    await run_db(delete_user_settings, user_id)
+    await run_db(delete_archived_reminders_for_user, user_id)
+    await conversations.clear(user_id)
+    reminder_cache.invalidate(user_id)
+    cancel_user_reminders(user_id)
+    await update.message.reply_text(TEXTS[language_of(update.effective_user)]["stopped"], parse_mode='Markdown')
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+async def load_reminder_window(window_start, window_end, shard_filter=None):
+    # Each interval is its own indexed range query: a fire at deadline - offset falls in the
+    # window when the deadline is in [window_start + offset, window_end + offset). A top-up
+    # therefore reads only the rows that gain a fire, not every deadline within the largest offset.
+    rows_read = 0
+    loaded_at = reminder_scheduler.begin_load()
+    if shard_filter is None and shards is not None:
+        shard_filter = shards.filter()
+    if shard_filter is not None and not shard_filter[1]:
+        return rows_read
+    # A reminder matches one query per interval in the window; schedule() queues all of those
+    # fires on the first match, so later matches are skipped
+    seen = set()
+    for offset, _ in REMINDER_INTERVALS:
+        after_deadline, after_id = window_start + offset, 0
+        range_end = math.ceil(window_end + offset)
+        while True:
+            rows = await run_db(get_due_reminders, after_deadline, range_end, REHYDRATE_CHUNK_SIZE, after_id, shard_filter)
+            for reminder_id, user_id, desc, deadline, timezone in rows:
+                if reminder_id in seen:
+                    continue
+                seen.add(reminder_id)
+                try:
+                    reminder_scheduler.schedule(
+                        reminder_id, user_id, user_id, desc, deadline, now=window_start, until=window_end,
+                        loaded_at=loaded_at, tz=get_zone(timezone)
+                    )
+                except Exception as e:
+                    logging.error(f"Error setting up reminder from DB: {e}")
+            rows_read += len(rows)
+            if len(rows) < REHYDRATE_CHUNK_SIZE:
+                break
+            after_id, after_deadline = rows[-1][0], rows[-1][3]
+    reminder_scheduler.horizon_end = max(window_end, reminder_scheduler.horizon_end or window_end)
+    return rows_read
+
+async def top_up_reminders(context: ContextTypes.DEFAULT_TYPE):
+    stale = await run_db(get_stale_recurring_reminders, time.time() - DELIVERY_GRACE)
+    if stale:
+        await advance_recurring(dict.fromkeys(stale))
+    window_start = reminder_scheduler.horizon_end or time.time()
+    window_end = time.time() + REMINDER_HORIZON
+    if window_end > window_start:
+        rows_read = await load_reminder_window(window_start, window_end)
+        logging.info(f"Reminder horizon extended: {rows_read} reminders read, {len(reminder_scheduler)} fires queued")
+
+async def renew_shards(context: ContextTypes.DEFAULT_TYPE):
+    gained, lost = await shards.renew(reminder_scheduler.dispatched_until)
+    if lost:
+        reminder_scheduler.cancel_users(lambda user_id: shards.shard_of(user_id) in lost)
+    if gained and reminder_scheduler.horizon_end is not None:
+        # Resume where the previous owner stopped; fires already past are sent right away
+        resume_from = min(gained.values())
+        await load_reminder_window(resume_from, reminder_scheduler.horizon_end, (shards.shard_count, tuple(gained)))
+
+async def poll_new_reminders(context: ContextTypes.DEFAULT_TYPE):
+    # Pick up reminders other processes added for the shards held here
+    global _last_seen_reminder_id
+    rows = await run_db(get_reminders_created_after, _last_seen_reminder_id, REHYDRATE_CHUNK_SIZE)
+    loaded_at = reminder_scheduler.begin_load()
+    for reminder_id, user_id, desc, deadline, timezone in rows:
+        reminder_cache.invalidate(user_id)
+        if deadline is not None and shards.owns(user_id):
+            reminder_scheduler.schedule(
+                reminder_id, user_id, user_id, desc, deadline, until=reminder_scheduler.horizon_end, loaded_at=loaded_at,
+                tz=get_zone(timezone)
+            )
+    if rows:
+        _last_seen_reminder_id = rows[-1][0]
+
+async def run_maintenance(context: ContextTypes.DEFAULT_TYPE):
+    # Archive expired reminders in batches, drop archived ones past retention and deliveries
+    # older than the catch-up grace, then compact. Never archive inside the grace, whose fires
+    # may still be sent after a restart.
+    now = time.time()
+    expire_before = now - max(REMINDER_EXPIRE_AFTER, DELIVERY_GRACE)
+    archived = 0
+    while True:
+        rows = await run_db(archive_expired_reminders, expire_before, now, MAINTENANCE_BATCH_SIZE)
+        for _, user_id in rows:
+            reminder_cache.invalidate(user_id)
+        archived += len(rows)
+        if len(rows) < MAINTENANCE_BATCH_SIZE:
+            break
+    purged = 0
+    while True:
+        removed = await run_db(purge_archived_reminders, now - REMINDER_ARCHIVE_RETENTION, MAINTENANCE_BATCH_SIZE)
+        purged += removed
+        if removed < MAINTENANCE_BATCH_SIZE:
+            break
+    pruned = 0
+    while True:
+        removed = await run_db(prune_deliveries, now - DELIVERY_GRACE, MAINTENANCE_BATCH_SIZE)
+        pruned += removed
+        if removed < MAINTENANCE_BATCH_SIZE:
+            break
+    size_before, size_after = await run_db(compact_database)
+    reclaimed = max(0, size_before - size_after)
+    MAINTENANCE_ROWS.inc(archived, action="archived")
+    MAINTENANCE_ROWS.inc(purged, action="purged")
+    MAINTENANCE_ROWS.inc(pruned, action="deliveries_pruned")
+    MAINTENANCE_BYTES.inc(reclaimed)
+    logging.info(
+        f"Maintenance: {archived} reminders archived, {purged} archived reminders deleted, "
+        f"{pruned} old deliveries pruned, "
+        f"{reclaimed / 1024:.0f} KiB reclaimed, database now {size_after / 1024 / 1024:.1f} MiB"
+    )
 
 async def setup_loaded_reminders(application):
-    import sqlite3
-    from db import DB_PATH
-    from utils import get_month_number
-    from datetime import datetime, timedelta
-    import logging
+    global _last_seen_reminder_id
     if not application.job_queue:
         logging.warning("Job queue unavailable, skipping reminder setup")
         return
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT user_id, description, deadline, id FROM reminders")
-    rows = c.fetchall()
-    conn.close()
-    for user_id, desc, deadline_str, reminder_id in rows:
-        try:
-            day_part, month_time = deadline_str.split('-', 1)
-            month_name, time_str = month_time.split(' ', 1)
-            month = get_month_number(month_name)
-            day = int(day_part)
-            hour, minute = map(int, time_str.split(':'))
-            current_year = datetime.now().year
-            deadline = datetime(current_year, month, day, hour, minute)
-            if deadline < datetime.now():
-                deadline = datetime(current_year + 1, month, day, hour, minute)
-            if deadline > datetime.now():
-                reminder_intervals = [
-                    {"days": 3, "label": "3 days"},
-                    {"days": 1, "label": "1 day"},
-                    {"hours": 12, "label": "12 hours"},
-                    {"hours": 5, "label": "5 hours"},
-                    {"hours": 3, "label": "3 hours"},
-                    {"hours": 1, "label": "1 hour"},
-                    {"minutes": 30, "label": "30 minutes"}
-                ]
-                for interval in reminder_intervals:
-                    kwargs = {}
-                    reminder_label = ""
-                    if "days" in interval:
-                        kwargs["days"] = interval["days"]
-                        reminder_label = interval["label"]
-                    elif "hours" in interval:
-                        kwargs["hours"] = interval["hours"]
-                        reminder_label = interval["label"]
-                    elif "minutes" in interval:
-                        kwargs["minutes"] = interval["minutes"]
-                        reminder_label = interval["label"]
-                    delta = timedelta(**kwargs)
-                    reminder_time = deadline - delta
-                    if reminder_time > datetime.now():
-                        delay = (reminder_time - datetime.now()).total_seconds()
-                        j = application.job_queue.run_once(
-                            send_reminder,
-                            when=delay,
-                            chat_id=user_id,
-                            name=f"{user_id}-{desc}-{reminder_time}",
-                            data={
-                                "desc": desc,
-                                "deadline": deadline.strftime("%d-%B %H:%M"),
-                                "interval": reminder_label
-                            }
-                        )
-                        global pending_jobs
-                        if user_id in pending_jobs:
-                            pending_jobs[user_id].append(j)
-                        else:
-                            pending_jobs[user_id] = [j]
-        except Exception as e:
-            logging.error(f"Error setting up reminder from DB: {e}")
+    started = time.perf_counter()
+    if shards is not None:
+        _last_seen_reminder_id = await run_db(get_max_reminder_id)
+        gained, _ = await shards.renew(reminder_scheduler.dispatched_until)
+        application.job_queue.run_repeating(renew_shards, interval=shards.ttl / 3, first=shards.ttl / 3, name="shard-leases")
+        application.job_queue.run_repeating(poll_new_reminders, interval=SHARD_POLL_INTERVAL, first=SHARD_POLL_INTERVAL, name="shard-poll")
+    now = time.time()
+    # Recurring reminders whose occurrence was missed entirely move on to their next one
+    stale = await run_db(get_stale_recurring_reminders, now - DELIVERY_GRACE)
+    if stale:
+        # Updates are handled meanwhile, so a list cached since start may show the old deadline
+        for _, user_id, _, _, _ in await run_db(advance_recurring_reminders, stale, now):
+            reminder_cache.invalidate(user_id)
+    # Catch up on fires missed while down; ones already in the delivery ledger are skipped
+    window_start = now - DELIVERY_GRACE
+    if shards is not None:
+        window_start = min(min(gained.values(), default=now), window_start)
+    rows_read = await load_reminder_window(window_start, now + REMINDER_HORIZON)
+    application.job_queue.run_repeating(
+        top_up_reminders, interval=REMINDER_TOPUP_INTERVAL, first=REMINDER_TOPUP_INTERVAL, name="reminder-topup"
+    )
+    application.job_queue.run_repeating(delivery_ledger.flush, interval=1, first=1, name="delivery-ledger")
+    application.job_queue.run_repeating(run_maintenance, interval=MAINTENANCE_INTERVAL, first=60, name="maintenance")
+    rss = _peak_rss_mb()
+    logging.info(
+        f"Loaded reminders for the next {REMINDER_HORIZON / 3600:g}h in {time.perf_counter() - started:.3f}s: "
+        f"{rows_read} reminders read, {len(reminder_scheduler)} fires queued"
+        + (f", peak RSS {rss:.1f} MB" if rss is not None else "")
+    )
@@ -0,0 +1,49 @@
+import logging, time
+from db import run_db, record_deliveries, get_delivered
+
+class DeliveryLedger:
+    """Records which (reminder_id, fire_ts) notifications were sent, in batched transactions.
+
+    Sends are buffered and written every ``flush_size`` entries or when flush() runs on its
+    timer. Before dispatching, the scheduler's due fires are checked against the ledger,
+    including entries not yet written, so a restart or a shard takeover doesn't send them twice.
+    Delivery is at-least-once: a crash after a send but before its flush repeats that send.
+    """
+
+    def __init__(self, flush_size=100):
+        self.flush_size = flush_size
+        self._buffer = []
+        self._pending = set()
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def record(self, deliveries):
+        now = int(time.time())
+        for reminder_id, fire_ts in deliveries:
+            self._buffer.append((reminder_id, int(fire_ts), now))
+            self._pending.add((reminder_id, int(fire_ts)))
+
+    @property
+    def needs_flush(self):
+        return len(self._buffer) >= self.flush_size
+
+    async def flush(self, context=None):
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        try:
+            await run_db(record_deliveries, rows)
+        except Exception as e:
+            logging.error(f"Error writing {len(rows)} deliveries: {e}")
+            self._buffer = rows + self._buffer
+            return
+        for reminder_id, fire_ts, _ in rows:
+            self._pending.discard((reminder_id, fire_ts))
+
+    async def undelivered(self, batch):
+        """Filter a scheduler batch down to fires that have not been delivered yet."""
+        since = min((data["fire_ts"] for _, data in batch), default=0)
+        delivered = await run_db(get_delivered, {data["reminder_id"] for _, data in batch}, since)
+        delivered |= self._pending
+        return [(chat_id, data) for chat_id, data in batch if (data["reminder_id"], int(data["fire_ts"])) not in delivered]
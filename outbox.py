@@ -0,0 +1,249 @@
+import asyncio, heapq, itertools, logging, time
+from collections import deque
+from datetime import timedelta
+from telegram.error import RetryAfter, NetworkError, Forbidden, BadRequest
+
+# Lower values are sent first
+PRIORITY_DEADLINE = 0
+PRIORITY_REMINDER = 1
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate, capacity=None, now=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic() if now is None else now
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, now):
+        # Seconds until one token is available
+        if now < self.updated:
+            return self.updated - now + max(0.0, 1 - self.tokens) / self.rate
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause(self, now, seconds):
+        self._refill(now)
+        self.tokens = min(self.tokens, 0)
+        self.updated = now + seconds
+
+class OutgoingMessage:
+    __slots__ = ("chat_id", "text", "kwargs", "priority", "tag", "enqueued_at", "attempts")
+
+    def __init__(self, chat_id, text, kwargs, priority, tag=None):
+        self.chat_id = chat_id
+        self.text = text
+        self.kwargs = kwargs
+        self.priority = priority
+        self.tag = tag
+        self.enqueued_at = time.monotonic()
+        self.attempts = 0
+
+class Outbox:
+    """Queue for outbound messages that stays within Telegram's flood limits.
+
+    Sending is limited by a global token bucket and one bucket per chat. A message whose chat
+    has no token yet waits in a delayed heap so it does not hold up other chats. Messages that
+    get a 429 are retried after the ``retry_after`` Telegram asks for. ``on_sent`` is called
+    with a message's ``tag`` once it has been delivered.
+    """
+
+    def __init__(self, global_rate=30, chat_rate=1, max_retries=5, max_in_flight=30, on_sent=None):
+        self.on_sent = on_sent
+        self.chat_rate = chat_rate
+        self.max_retries = max_retries
+        self._global = TokenBucket(global_rate)
+        self._chat_buckets = {}
+        self._ready = []  # heap of (priority, seq, message)
+        self._delayed = []  # heap of (ready_at, seq, message)
+        self._seq = itertools.count()
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._sending = set()
+        self._in_flight = 0
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self._latencies = deque(maxlen=1000)
+
+    def __len__(self):
+        return len(self._ready) + len(self._delayed)
+
+    def send(self, chat_id, text, priority=PRIORITY_REMINDER, tag=None, **kwargs):
+        message = OutgoingMessage(chat_id, text, kwargs, priority, tag)
+        heapq.heappush(self._ready, (priority, next(self._seq), message))
+        self._wakeup.set()
+
+    def start(self, bot):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(bot))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self):
+        latencies = sorted(self._latencies)
+        p50 = latencies[len(latencies) // 2] if latencies else 0.0
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0.0
+        return {
+            "queue_depth": len(self),
+            "in_flight": self._in_flight,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "latency_p50": p50,
+            "latency_p99": p99,
+        }
+
+    async def log_stats(self, context):
+        stats = self.stats()
+        if stats["sent"] or stats["queue_depth"]:
+            logging.info(
+                "Outbox: depth={queue_depth} in_flight={in_flight} sent={sent} failed={failed} "
+                "retried={retried} latency p50={latency_p50:.3f}s p99={latency_p99:.3f}s".format(**stats)
+            )
+
+    def _chat_bucket(self, chat_id, now):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) > 10000:
+                self._evict_idle_buckets(now)
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate, now=now)
+        return bucket
+
+    def _evict_idle_buckets(self, now):
+        # A bucket that has refilled completely carries no state worth keeping
+        for chat_id in [c for c, b in self._chat_buckets.items() if b.delay(now) == 0 and b.tokens >= b.capacity]:
+            del self._chat_buckets[chat_id]
+
+    async def _wait(self, timeout):
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self, bot):
+        while True:
+            await self._slots.acquire()
+            message = await self._next_message()
+            self._in_flight += 1
+            task = asyncio.create_task(self._send(bot, message))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _next_message(self):
+        while True:
+            now = time.monotonic()
+            while self._delayed and self._delayed[0][0] <= now:
+                _, seq, message = heapq.heappop(self._delayed)
+                heapq.heappush(self._ready, (message.priority, seq, message))
+            if not self._ready:
+                await self._wait(self._delayed[0][0] - now if self._delayed else None)
+                continue
+            message = self._ready[0][2]
+            bucket = self._chat_bucket(message.chat_id, now)
+            wait = bucket.delay(now)
+            if wait > 0:
+                _, seq, message = heapq.heappop(self._ready)
+                heapq.heappush(self._delayed, (now + wait, seq, message))
+                continue
+            wait = self._global.delay(now)
+            if wait > 0:
+                await self._wait(wait)
+                continue
+            heapq.heappop(self._ready)
+            bucket.consume(now)
+            self._global.consume(now)
+            return message
+
+    def _retry(self, message, delay):
+        message.attempts += 1
+        if message.attempts > self.max_retries:
+            self.failed += 1
+            logging.error(f"Giving up sending to {message.chat_id} after {message.attempts} attempts")
+            return
+        self.retried += 1
+        heapq.heappush(self._delayed, (time.monotonic() + delay, next(self._seq), message))
+        self._wakeup.set()
+
+    async def _send(self, bot, message):
+        try:
+            await bot.send_message(chat_id=message.chat_id, text=message.text, **message.kwargs)
+            self.sent += 1
+            self._latencies.append(time.monotonic() - message.enqueued_at)
+            if self.on_sent is not None and message.tag is not None:
+                self.on_sent(message.tag)
+        except RetryAfter as e:
+            retry_after = e.retry_after
+            if isinstance(retry_after, timedelta):
+                retry_after = retry_after.total_seconds()
+            self._chat_bucket(message.chat_id, time.monotonic()).pause(time.monotonic(), retry_after)
+            self._retry(message, retry_after)
+        except (Forbidden, BadRequest) as e:
+            self.failed += 1
+            logging.error(f"Error sending message to {message.chat_id}: {e}")
+        except NetworkError as e:
+            self._retry(message, 2 ** message.attempts)
+            logging.warning(f"Network error sending message to {message.chat_id}, retrying: {e}")
+        except Exception as e:
+            self.failed += 1
+            logging.error(f"Error sending message to {message.chat_id}: {e}")
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+
+class Coalescer:
+    """Collects items per chat for ``window`` seconds and hands them to ``flush`` as one group.
+
+    Items added for the same chat during the window are flushed together, so several reminders
+    firing at once become a single message.
+    """
+
+    def __init__(self, flush, window=2.0):
+        self.flush = flush
+        self.window = window
+        self._pending = {}  # key: chat_id, value: list of items
+
+    def __len__(self):
+        return sum(len(items) for items in self._pending.values())
+
+    def add(self, chat_id, item):
+        items = self._pending.get(chat_id)
+        if items is None:
+            self._pending[chat_id] = [item]
+            asyncio.get_running_loop().call_later(self.window, self._flush, chat_id)
+        else:
+            items.append(item)
+
+    def discard(self, predicate):
+        # Drop collected items that should no longer be sent
+        for chat_id, items in self._pending.items():
+            items[:] = [item for item in items if not predicate(item)]
+
+    def _flush(self, chat_id):
+        items = self._pending.pop(chat_id, None)
+        if items:
+            try:
+                self.flush(chat_id, items)
+            except Exception as e:
+                logging.error(f"Error flushing messages for {chat_id}: {e}")
@@ -0,0 +1,57 @@
+import time
+from collections import OrderedDict
+from outbox import TokenBucket
+
+class UserRateLimiter:
+    """Per-user token buckets for incoming updates.
+
+    A user may send ``burst`` updates at once and ``rate`` per second after that. Buckets are
+    kept in least-recently-used order, so the idle ones are at the front: a bucket idle long
+    enough to refill completely carries no state and is dropped on the next call. Memory is
+    one bucket per user active in the last ``burst / rate`` seconds, capped at ``max_users``.
+    """
+
+    def __init__(self, rate, burst=10, max_users=100000):
+        self.rate = rate
+        self.burst = burst
+        self.max_users = max_users
+        self.idle = burst / rate
+        self.allowed = 0
+        self.rejected = 0
+        self._buckets = OrderedDict()  # key: user_id, value: TokenBucket
+        self._notified = set()  # users told they are limited since their last allowed update
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def _evict(self, now):
+        while self._buckets:
+            user_id, bucket = next(iter(self._buckets.items()))
+            if len(self._buckets) <= self.max_users and bucket.updated > now - self.idle:
+                break
+            del self._buckets[user_id]
+            self._notified.discard(user_id)
+
+    def allow(self, user_id, now=None):
+        """Take a token for one update; False if the user is over the limit."""
+        now = time.monotonic() if now is None else now
+        self._evict(now)
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            bucket = self._buckets[user_id] = TokenBucket(self.rate, self.burst, now)
+        else:
+            self._buckets.move_to_end(user_id)
+        if bucket.delay(now) > 0:
+            self.rejected += 1
+            return False
+        bucket.consume(now)
+        self._notified.discard(user_id)
+        self.allowed += 1
+        return True
+
+    def should_notify(self, user_id):
+        """True once per run of rejected updates, so a flood costs at most one reply."""
+        if user_id in self._notified:
+            return False
+        self._notified.add(user_id)
+        return True
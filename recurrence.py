@@ -0,0 +1,144 @@
+import calendar
+from datetime import datetime, timedelta, timezone
+
+# The RRULE subset stored in reminders.recurrence, e.g. "FREQ=WEEKLY;BYDAY=MO,WE"
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+WEEKDAY_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+def parse_rule(text):
+    """Parse and validate an RRULE subset: FREQ, INTERVAL, BYDAY (weekly), BYHOUR, BYMINUTE and UNTIL.
+
+    Returns a dict with freq, interval, byday (weekday numbers, Monday = 0), byhour and byminute
+    (a single value or None) and until (epoch seconds or None). Raises ValueError for anything
+    outside the subset.
+    """
+    text = text.strip()
+    if text.upper().startswith("RRULE:"):
+        text = text[6:]
+    parts = {}
+    for part in text.split(";"):
+        key, sep, value = part.partition("=")
+        if not sep or not value:
+            raise ValueError(f"Invalid recurrence rule {text!r}")
+        parts[key.strip().upper()] = value.strip().upper()
+    freq = parts.pop("FREQ", None)
+    if freq not in FREQUENCIES:
+        raise ValueError("Recurrence must be daily, weekly or monthly")
+    try:
+        interval = int(parts.pop("INTERVAL", "1"))
+    except ValueError:
+        raise ValueError("INTERVAL must be a number")
+    if interval < 1:
+        raise ValueError("INTERVAL must be at least 1")
+    byday = ()
+    if "BYDAY" in parts:
+        if freq != "WEEKLY":
+            raise ValueError("BYDAY is only supported for weekly recurrence")
+        try:
+            byday = tuple(sorted({WEEKDAYS.index(day) for day in parts.pop("BYDAY").split(",")}))
+        except ValueError:
+            raise ValueError("BYDAY must list days such as MO,WE,FR")
+    byhour = _parse_time_part(parts.pop("BYHOUR", None), "BYHOUR", 23)
+    byminute = _parse_time_part(parts.pop("BYMINUTE", None), "BYMINUTE", 59)
+    until = None
+    if "UNTIL" in parts:
+        until = _parse_until(parts.pop("UNTIL"))
+    if parts:
+        raise ValueError(f"Unsupported recurrence options: {', '.join(sorted(parts))}")
+    return {"freq": freq, "interval": interval, "byday": byday, "byhour": byhour, "byminute": byminute,
+            "until": until}
+
+def _parse_time_part(value, name, highest):
+    if value is None:
+        return None
+    if not value.isdigit() or int(value) > highest:
+        raise ValueError(f"{name} must be a single number from 0 to {highest}")
+    return int(value)
+
+def _parse_until(value):
+    try:
+        if value.endswith("Z"):
+            return datetime.strptime(value, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc).timestamp()
+        if "T" in value:
+            return datetime.strptime(value, "%Y%m%dT%H%M%S").timestamp()
+        # A date alone includes that whole day
+        return (datetime.strptime(value, "%Y%m%d") + timedelta(days=1)).timestamp() - 1
+    except ValueError:
+        raise ValueError(f"Invalid UNTIL {value!r}")
+
+def format_rule(rule):
+    """Canonical RRULE text for a parsed rule, as stored in the database."""
+    text = f"FREQ={rule['freq']}"
+    if rule["interval"] != 1:
+        text += f";INTERVAL={rule['interval']}"
+    if rule["byday"]:
+        text += ";BYDAY=" + ",".join(WEEKDAYS[day] for day in rule["byday"])
+    if rule["byhour"] is not None:
+        text += f";BYHOUR={rule['byhour']}"
+    if rule["byminute"] is not None:
+        text += f";BYMINUTE={rule['byminute']}"
+    if rule["until"] is not None:
+        text += ";UNTIL=" + datetime.fromtimestamp(rule["until"], timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return text
+
+def describe_rule(text):
+    """Short human-readable form, e.g. "every Monday, Wednesday" or "every 2 weeks"."""
+    rule = parse_rule(text)
+    unit = {"DAILY": "day", "WEEKLY": "week", "MONTHLY": "month"}[rule["freq"]]
+    if rule["byday"]:
+        days = ", ".join(WEEKDAY_NAMES[day] for day in rule["byday"])
+        return f"every {days}" if rule["interval"] == 1 else f"every {rule['interval']} weeks on {days}"
+    return f"every {unit}" if rule["interval"] == 1 else f"every {rule['interval']} {unit}s"
+
+def _add_months(moment, months, day):
+    # Months without this day (e.g. the 31st) are skipped rather than clamped
+    month_index = moment.year * 12 + moment.month - 1
+    while True:
+        month_index += months
+        year, month = divmod(month_index, 12)
+        if day <= calendar.monthrange(year, month + 1)[1]:
+            return moment.replace(year=year, month=month + 1, day=day)
+
+def _step(rule, moment):
+    if rule["freq"] == "DAILY":
+        return moment + timedelta(days=rule["interval"])
+    if rule["freq"] == "MONTHLY":
+        return _add_months(moment, rule["interval"], moment.day)
+    if not rule["byday"]:
+        return moment + timedelta(weeks=rule["interval"])
+    later = [day for day in rule["byday"] if day > moment.weekday()]
+    if later:
+        return moment + timedelta(days=later[0] - moment.weekday())
+    # First listed day of the next week in the cycle
+    week_start = moment - timedelta(days=moment.weekday())
+    return week_start + timedelta(weeks=rule["interval"], days=rule["byday"][0])
+
+def next_occurrence(text, current_ts, after_ts, tz=None):
+    """The first occurrence after after_ts of a series that has an occurrence at current_ts.
+
+    Times are stepped in wall-clock time of tz (server local time if None), so "08:00" stays
+    08:00 across DST changes. BYHOUR and BYMINUTE pin the time of day, so a series at a time
+    that did not exist on one day (02:30 when clocks go forward) returns to it the next day.
+    Returns None once the series has ended (UNTIL).
+    """
+    rule = parse_rule(text)
+    moment = datetime.fromtimestamp(current_ts, tz)
+    while True:
+        moment = _step(rule, moment)
+        if rule["byhour"] is not None:
+            moment = moment.replace(hour=rule["byhour"])
+        if rule["byminute"] is not None:
+            moment = moment.replace(minute=rule["byminute"])
+        ts = moment.timestamp()
+        if rule["until"] is not None and ts > rule["until"]:
+            return None
+        if ts > after_ts:
+            return ts
+
+def first_occurrence(text, start):
+    """The first occurrence at or after the datetime start, which sets the time of day."""
+    rule = parse_rule(text)
+    while rule["byday"] and start.weekday() not in rule["byday"]:
+        start += timedelta(days=1)
+    return start
@@ -0,0 +1,106 @@
+import bisect, sys, time
+from collections import OrderedDict
+from db import run_db, get_user_reminder_list, get_reminders_page
+
+class ReminderCache:
+    """Each user's reminder list and time zone, read through from SQLite into an LRU.
+
+    Entries are (rows, ids, timezone, size, loaded_at) with rows as (id, description, deadline,
+    recurrence) ordered by id. The cache is bounded by an estimate of its memory use. Users with
+    more than ``max_rows`` reminders get an entry with rows set to None, which keeps their time
+    zone and sends their pages straight to the database.
+    Every write to a user's reminders or settings must call invalidate(); entries also expire
+    after ``ttl`` seconds, which bounds staleness when other processes write to the database.
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, max_rows=500, ttl=300):
+        self.max_bytes = max_bytes
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._cache = OrderedDict()
+        self._loading = {}  # user_id: [loads in flight, invalidated while loading]
+
+    def __len__(self):
+        return len(self._cache)
+
+    def _get(self, user_id):
+        entry = self._cache.get(user_id)
+        if entry is not None and entry[4] < time.monotonic() - self.ttl:
+            self.invalidate(user_id)
+            return None
+        if entry is not None:
+            self._cache.move_to_end(user_id)
+        return entry
+
+    def cached_timezone(self, user_id):
+        """The user's stored time zone name if their entry is cached, else False."""
+        entry = self._get(user_id)
+        return entry[2] if entry is not None else False
+
+    async def _load(self, user_id):
+        loading = self._loading.setdefault(user_id, [0, False])
+        loading[0] += 1
+        try:
+            rows, timezone = await run_db(get_user_reminder_list, user_id, self.max_rows)
+        finally:
+            loading[0] -= 1
+            if not loading[0]:
+                del self._loading[user_id]
+        # A write that landed during the read may not be in the rows, so they are not kept
+        if loading[1]:
+            return None
+        if rows is None:
+            entry = (None, None, timezone, OVERSIZE_ENTRY_SIZE, time.monotonic())
+        else:
+            size = _estimate_size(rows)
+            if size > self.max_bytes:
+                return None
+            entry = (rows, [row[0] for row in rows], timezone, size, time.monotonic())
+        self.invalidate(user_id)
+        self._cache[user_id] = entry
+        self.bytes += entry[3]
+        while self.bytes > self.max_bytes:
+            _, (_, _, _, evicted_size, _) = self._cache.popitem(last=False)
+            self.bytes -= evicted_size
+        return entry
+
+    async def page(self, user_id, after_id=0, before_id=None, limit=5):
+        """Same result as db.get_reminders_page, served from the cache when possible."""
+        entry = self._get(user_id)
+        if entry is None:
+            self.misses += 1
+            entry = await self._load(user_id)
+        elif entry[0] is not None:
+            self.hits += 1
+        if entry is None or entry[0] is None:
+            return await run_db(get_reminders_page, user_id, after_id, before_id, limit)
+        rows, ids = entry[0], entry[1]
+        if before_id is not None:
+            end = bisect.bisect_left(ids, before_id)
+            start = max(0, end - limit)
+            return rows[start:end], start > 0, end < len(ids)
+        start = bisect.bisect_right(ids, after_id)
+        end = start + limit
+        return rows[start:end], start > 0, end < len(ids)
+
+    def invalidate(self, user_id):
+        entry = self._cache.pop(user_id, None)
+        if entry is not None:
+            self.bytes -= entry[3]
+        loading = self._loading.get(user_id)
+        if loading is not None:
+            loading[1] = True
+
+# Rough footprint of an entry for a user with too many reminders to cache
+OVERSIZE_ENTRY_SIZE = 200
+
+def _estimate_size(rows):
+    size = sys.getsizeof(rows) + sys.getsizeof([row[0] for row in rows])
+    for row in rows:
+        size += sys.getsizeof(row) + sys.getsizeof(row[1]) + 64
+        if row[3] is not None:
+            size += sys.getsizeof(row[3])
+    return size
@@ -0,0 +1,144 @@
+import csv, io, re
+from datetime import datetime, timezone
+from deadline_parser import PastDeadlineError, parse_deadline, parse_task
+from recurrence import format_rule, parse_rule
+
+CSV_HEADER = ("description", "deadline", "recurrence")
+EXPORT_TIME_FORMAT = "%Y-%m-%d %H:%M"
+ICS_DATETIME_RE = re.compile(r"^(\d{4})(\d{2})(\d{2})(?:T(\d{2})(\d{2})(\d{2})?(Z)?)?$")
+
+def _parse_deadline_cell(text, now):
+    # Export writes "YYYY-MM-DD HH:MM" in the user's time zone; epoch seconds and the chat forms are accepted too
+    text = text.strip()
+    if text.isdigit() and len(text) >= 9:
+        return float(text)
+    try:
+        moment = datetime.fromisoformat(text)
+        if moment.tzinfo is None and now is not None:
+            moment = moment.replace(tzinfo=now.tzinfo)
+        return moment.timestamp()
+    except ValueError:
+        pass
+    try:
+        return parse_deadline(text, now).timestamp()
+    except PastDeadlineError as e:
+        # Kept so recurring rows can start from their next occurrence; past one-offs are skipped later
+        return e.deadline.timestamp()
+
+def _parse_recurrence_cell(text):
+    text = text.strip()
+    return format_rule(parse_rule(text)) if text else None
+
+def parse_csv(text, now=None):
+    """Parse "description,deadline[,recurrence]" rows.
+
+    Returns ([(desc, deadline_ts, recurrence)], [(line, error)]); recurrence is an RRULE or None.
+    """
+    entries, errors = [], []
+    for line_no, row in enumerate(csv.reader(io.StringIO(text)), 1):
+        if not row or not any(cell.strip() for cell in row):
+            continue
+        if line_no == 1 and row[0].strip().lower() == CSV_HEADER[0]:
+            continue
+        if len(row) < 2 or not row[0].strip():
+            errors.append((line_no, "expected description,deadline"))
+            continue
+        try:
+            recurrence = _parse_recurrence_cell(row[2]) if len(row) > 2 else None
+            entries.append((row[0].strip(), _parse_deadline_cell(row[1], now), recurrence))
+        except ValueError as e:
+            errors.append((line_no, str(e)))
+    return entries, errors
+
+def _unfold_ics(text):
+    # Long iCalendar lines continue on lines starting with a space or tab
+    lines = []
+    for line in text.splitlines():
+        if line[:1] in (" ", "\t") and lines:
+            lines[-1] += line[1:]
+        elif line:
+            lines.append(line)
+    return lines
+
+def _unescape_ics(value):
+    return re.sub(r"\\([\\;,nN])", lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+
+def _parse_ics_datetime(params, value, tz=None):
+    match = ICS_DATETIME_RE.match(value.strip())
+    if match is None:
+        raise ValueError(f"Unrecognised DTSTART {value!r}")
+    year, month, day, hour, minute, second, utc = match.groups()
+    moment = datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0))
+    if utc:
+        return moment.replace(tzinfo=timezone.utc).timestamp()
+    if "TZID" in params:
+        from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+        try:
+            return moment.replace(tzinfo=ZoneInfo(params["TZID"])).timestamp()
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Unknown time zone {params['TZID']!r}")
+    # Floating times (no Z or TZID) are in the importing user's time zone
+    return moment.replace(tzinfo=tz).timestamp()
+
+def parse_ics(text, tz=None):
+    """Read SUMMARY, DTSTART and RRULE of every VEVENT.
+
+    Returns ([(desc, deadline_ts, recurrence)], [(line, error)]).
+    """
+    entries, errors = [], []
+    event = None
+    for line_no, line in enumerate(_unfold_ics(text), 1):
+        name, _, value = line.partition(":")
+        name, *raw_params = name.split(";")
+        name = name.upper()
+        if name == "BEGIN" and value.strip().upper() == "VEVENT":
+            event = {"line": line_no}
+        elif event is None:
+            continue
+        elif name == "END" and value.strip().upper() == "VEVENT":
+            if not event.get("summary") or "start" not in event:
+                errors.append((event["line"], "event without SUMMARY or DTSTART"))
+            else:
+                try:
+                    recurrence = format_rule(parse_rule(event["rrule"])) if "rrule" in event else None
+                    entries.append((event["summary"], _parse_ics_datetime(*event["start"], tz), recurrence))
+                except ValueError as e:
+                    errors.append((event["line"], str(e)))
+            event = None
+        elif name == "SUMMARY":
+            event["summary"] = _unescape_ics(value).strip()
+        elif name == "RRULE":
+            event["rrule"] = value
+        elif name == "DTSTART":
+            params = dict(param.split("=", 1) for param in raw_params if "=" in param)
+            event["start"] = ({key.upper(): value.strip('"') for key, value in params.items()}, value)
+    return entries, errors
+
+def parse_lines(text, now=None):
+    """Parse one "<description> <deadline>" reminder per line, like /setreminder."""
+    entries, errors = [], []
+    for line_no, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            desc, deadline, recurrence = parse_task(line, now)
+            entries.append((desc, deadline.timestamp(), recurrence))
+        except ValueError as e:
+            errors.append((line_no, str(e)))
+    return entries, errors
+
+def parse_import(text, filename=None, now=None):
+    """Pick the parser from the file name, or from the content for pasted text."""
+    name = (filename or "").lower()
+    if name.endswith(".ics") or text.lstrip().upper().startswith("BEGIN:VCALENDAR"):
+        return parse_ics(text, now.tzinfo if now is not None else None)
+    if name.endswith(".csv"):
+        return parse_csv(text, now)
+    return parse_lines(text, now)
+
+def write_csv(out, rows, tz=None):
+    """Write (description, deadline_ts, recurrence) rows in the format parse_csv reads back."""
+    writer = csv.writer(out)
+    for desc, deadline, recurrence in rows:
+        deadline = datetime.fromtimestamp(deadline, tz).strftime(EXPORT_TIME_FORMAT) if deadline is not None else ""
+        writer.writerow((desc, deadline, recurrence or ""))
@@ -0,0 +1,196 @@
+import heapq, logging, time
+from utils import format_deadline
+
+# Offsets (seconds before the deadline) at which reminders are sent, with their labels
+REMINDER_INTERVALS = (
+    (5 * 86400, "5 days"),
+    (3 * 86400, "3 days"),
+    (86400, "1 day"),
+    (12 * 3600, "12 hours"),
+    (6 * 3600, "6 hours"),
+    (3 * 3600, "3 hours"),
+    (3600, "1 hour"),
+    (1800, "30 minutes"),
+    (0, "Deadline"),
+)
+
+def upcoming_intervals(deadline_ts, now=None):
+    now = time.time() if now is None else now
+    return [label for offset, label in REMINDER_INTERVALS if deadline_ts - offset >= now]
+
+class ReminderScheduler:
+    """Keeps every pending reminder fire in one min-heap driven by a single periodic job.
+
+    Heap entries are compact (fire_ts, reminder_id, interval_index) tuples; the reminder's
+    text and chat are stored once in ``_reminders``. Due entries are handed to ``dispatch``
+    in batches of at most ``batch_size``. ``horizon_end`` records how far ahead reminders
+    loaded from the database have been scheduled.
+
+    Cancelling is O(1) per reminder: its metadata is dropped from the reminder and user
+    indexes, and its heap entries are skipped when they come due. The heap is rebuilt once
+    stale entries make up most of it.
+    """
+
+    def __init__(self, dispatch, tick_interval=1.0, batch_size=500):
+        self.dispatch = dispatch
+        self.tick_interval = tick_interval
+        self.batch_size = batch_size
+        self._heap = []
+        self._reminders = {}  # key: reminder_id, value: [chat_id, desc, deadline_ts, pending fires, scheduled until, user_id]
+        self._user_reminders = {}  # key: user_id, value: set of reminder ids
+        # Recent cancellations, so rows a database load read just before they were deleted
+        # are not scheduled again
+        self._cancelled = {}  # key: reminder_id, value: cancel time
+        self._cancelled_users = {}  # key: user_id, value: cancel time
+        self._stale = 0
+        self._job = None
+        self.horizon_end = None
+        # Every fire before this time has been handed to dispatch
+        self.dispatched_until = time.time()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def start(self, job_queue):
+        if self._job is None:
+            self._job = job_queue.run_repeating(
+                self._tick, interval=self.tick_interval, first=self.tick_interval, name="reminder-scheduler"
+            )
+
+    def stop(self):
+        if self._job is not None:
+            self._job.schedule_removal()
+            self._job = None
+
+    def __contains__(self, reminder_id):
+        return reminder_id in self._reminders
+
+    def user_reminder_count(self, user_id):
+        return len(self._user_reminders.get(user_id, ()))
+
+    def begin_load(self):
+        """Mark the start of a database load; pass the result as loaded_at to schedule()."""
+        now = time.monotonic()
+        # Loads finish well within this long, so older cancellations can be forgotten
+        for cancelled in (self._cancelled, self._cancelled_users):
+            while cancelled:
+                key, cancelled_at = next(iter(cancelled.items()))
+                if cancelled_at > now - 600:
+                    break
+                del cancelled[key]
+        return now
+
+    def schedule(self, reminder_id, user_id, chat_id, desc, deadline_ts, now=None, until=None, loaded_at=None, tz=None):
+        """Queue the intervals of a reminder firing in [now, until) and return their labels.
+
+        Fire times are epoch seconds; tz only sets how the deadline is shown in the message.
+
+        Calling this again for the same reminder only adds fires past what was already queued,
+        so overlapping windows never schedule an interval twice. Rows read from the database
+        pass loaded_at and are ignored if the reminder was cancelled after the read began.
+        """
+        if loaded_at is not None and (
+            self._cancelled.get(reminder_id, -1) >= loaded_at or self._cancelled_users.get(user_id, -1) >= loaded_at
+        ):
+            return []
+        now = time.time() if now is None else now
+        until = float("inf") if until is None else until
+        reminder = self._reminders.get(reminder_id)
+        if reminder is not None:
+            now = max(now, reminder[4])
+        labels = []
+        for index, (offset, label) in enumerate(REMINDER_INTERVALS):
+            fire_ts = deadline_ts - offset
+            if now <= fire_ts < until:
+                heapq.heappush(self._heap, (fire_ts, reminder_id, index))
+                labels.append(label)
+        if reminder is not None:
+            reminder[3] += len(labels)
+            reminder[4] = max(reminder[4], until)
+        elif labels:
+            self._reminders[reminder_id] = [chat_id, desc, deadline_ts, len(labels), until, user_id, tz]
+            self._user_reminders.setdefault(user_id, set()).add(reminder_id)
+        return labels
+
+    def cancel(self, reminder_id):
+        """Drop every pending fire of a reminder. Returns False if it had none."""
+        self._cancelled.pop(reminder_id, None)
+        self._cancelled[reminder_id] = time.monotonic()
+        reminder = self._reminders.pop(reminder_id, None)
+        if reminder is None:
+            return False
+        self._stale += reminder[3]
+        self._forget_user_reminder(reminder[5], reminder_id)
+        self._maybe_compact()
+        return True
+
+    def cancel_user(self, user_id):
+        self._cancelled_users.pop(user_id, None)
+        self._cancelled_users[user_id] = time.monotonic()
+        reminder_ids = self._user_reminders.pop(user_id, ())
+        for reminder_id in reminder_ids:
+            self._stale += self._reminders.pop(reminder_id)[3]
+        self._maybe_compact()
+        return reminder_ids
+
+    def set_user_timezone(self, user_id, tz):
+        for reminder_id in self._user_reminders.get(user_id, ()):
+            self._reminders[reminder_id][6] = tz
+
+    def cancel_users(self, predicate):
+        # Cancel the reminders of every user matching predicate (e.g. a shard given up)
+        for user_id in [user_id for user_id in self._user_reminders if predicate(user_id)]:
+            self.cancel_user(user_id)
+
+    def _forget_user_reminder(self, user_id, reminder_id):
+        reminder_ids = self._user_reminders.get(user_id)
+        if reminder_ids is not None:
+            reminder_ids.discard(reminder_id)
+            if not reminder_ids:
+                del self._user_reminders[user_id]
+
+    def _maybe_compact(self):
+        if self._stale > 1024 and self._stale * 2 > len(self._heap):
+            self._heap = [entry for entry in self._heap if entry[1] in self._reminders]
+            heapq.heapify(self._heap)
+            self._stale = 0
+
+    def pop_due(self, now):
+        batch = []
+        heap = self._heap
+        while heap and heap[0][0] <= now and len(batch) < self.batch_size:
+            fire_ts, reminder_id, index = heapq.heappop(heap)
+            reminder = self._reminders.get(reminder_id)
+            if reminder is None:
+                self._stale = max(0, self._stale - 1)
+                continue
+            chat_id, desc, deadline_ts, pending, _, user_id, tz = reminder
+            if pending <= 1:
+                del self._reminders[reminder_id]
+                self._forget_user_reminder(user_id, reminder_id)
+            else:
+                reminder[3] = pending - 1
+            batch.append((chat_id, {
+                "reminder_id": reminder_id,
+                "user_id": user_id,
+                "desc": desc,
+                "deadline": format_deadline(deadline_ts, tz),
+                "interval": REMINDER_INTERVALS[index][1],
+                "deadline_dt": deadline_ts,
+                "fire_ts": fire_ts,
+            }))
+        if len(batch) < self.batch_size:
+            self.dispatched_until = now
+        elif batch:
+            self.dispatched_until = batch[-1][1]["fire_ts"]
+        return batch
+
+    async def _tick(self, context):
+        while True:
+            batch = self.pop_due(time.time())
+            if not batch:
+                return
+            try:
+                await self.dispatch(context, batch)
+            except Exception as e:
+                logging.error(f"Error dispatching reminder batch: {e}")
@@ -0,0 +1,84 @@
+import logging, os, socket, time
+from db import run_db, acquire_shard_lease, release_shard_leases
+
+SHARD_LEASE_TTL = float(os.environ.get("SHARD_LEASE_SECONDS", "30"))
+
+class ShardLeases:
+    """Lease-based ownership of user_id partitions shared by several bot processes.
+
+    Reminders belong to shard ``user_id % shard_count``. Each process renews the leases it
+    holds and takes over shards whose lease has expired, so the reminders of a dead worker
+    move to a live one. A lease also stores how far its owner has dispatched reminders, and
+    a new owner resumes from that point. A shard whose lease could not be renewed in time is
+    treated as lost, so two processes never send for the same shard.
+    """
+
+    def __init__(self, shard_count, preferred=None, owner=None, ttl=SHARD_LEASE_TTL, max_catchup=900.0):
+        self.shard_count = shard_count
+        self.preferred = preferred
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self.ttl = ttl
+        # A new owner never replays more than this many seconds of missed reminders
+        self.max_catchup = max_catchup
+        self._expires = {}  # key: owned shard, value: local lease expiry
+        self._started = time.time()
+
+    @property
+    def owned(self):
+        now = time.time()
+        return tuple(sorted(shard for shard, expires in self._expires.items() if expires > now))
+
+    def shard_of(self, user_id):
+        return user_id % self.shard_count
+
+    def owns(self, user_id):
+        return self._expires.get(user_id % self.shard_count, 0) > time.time()
+
+    def filter(self):
+        # Argument for db queries that should only return rows of owned shards
+        return (self.shard_count, self.owned)
+
+    async def renew(self, resume_from):
+        """Renew held leases and try to take over free ones.
+
+        resume_from is how far this process has dispatched reminders; it is stored with every
+        held lease. Returns (gained, lost): gained maps each newly acquired shard to the time
+        its reminders should be resumed from, lost is the set of shards no longer held.
+        """
+        gained, lost = {}, set()
+        shards = list(range(self.shard_count))
+        if self.preferred is not None:
+            # Claim our own shard first so workers spread out when they all start together
+            shards.sort(key=lambda shard: shard != self.preferred)
+        for shard in shards:
+            held = shard in self._expires
+            now = time.time()
+            expired_before = now
+            if not held and self.preferred is not None and shard != self.preferred:
+                # Leave other workers' shards alone until they have been unowned for a full lease
+                if now < self._started + self.ttl:
+                    continue
+                expired_before = now - self.ttl
+            try:
+                acquired, previous = await run_db(
+                    acquire_shard_lease, shard, self.owner, now, self.ttl, resume_from if held else None, expired_before
+                )
+            except Exception as e:
+                logging.error(f"Error renewing lease on shard {shard}: {e}")
+                acquired, previous = False, None
+            if acquired:
+                if not held:
+                    resume = previous[2] if previous is not None and previous[2] is not None else now
+                    gained[shard] = max(min(resume, now), now - self.max_catchup)
+                    logging.info(f"Acquired shard {shard}/{self.shard_count} as {self.owner}")
+                self._expires[shard] = now + self.ttl
+            elif held and (self._expires[shard] <= time.time() or previous is not None and previous[0] != self.owner):
+                # Taken over by another process, or the database was unreachable for a whole lease
+                del self._expires[shard]
+                lost.add(shard)
+                logging.warning(f"Lost shard {shard}/{self.shard_count}")
+        return gained, lost
+
+    async def release(self):
+        self._expires.clear()
+        await run_db(release_shard_leases, self.owner)
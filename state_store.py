@@ -0,0 +1,61 @@
+import logging, time
+from collections import OrderedDict
+from db import run_db, save_conversation, load_conversation, delete_conversation, delete_stale_conversations
+
+class ConversationStore:
+    """Add-reminder conversation state, persisted in SQLite with an in-memory LRU in front.
+
+    States are dicts like {'state': 'waiting_for_deadline', 'desc': ...}. Users with no
+    conversation are cached too (as None), so ordinary text messages don't hit the database.
+    Conversations untouched for ``ttl`` seconds expire.
+    """
+
+    def __init__(self, max_entries=10000, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._cache = OrderedDict()  # key: user_id, value: (state dict or None, updated_at)
+
+    def __len__(self):
+        return len(self._cache)
+
+    def _remember(self, user_id, state, updated_at):
+        self._cache[user_id] = (state, updated_at)
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    async def get(self, user_id):
+        entry = self._cache.get(user_id)
+        if entry is None:
+            row = await run_db(load_conversation, user_id)
+            if row is None:
+                entry = (None, time.time())
+            else:
+                state, desc, updated_at = row
+                entry = ({'state': state, 'desc': desc} if desc is not None else {'state': state}, updated_at)
+            self._remember(user_id, *entry)
+        else:
+            self._cache.move_to_end(user_id)
+        state, updated_at = entry
+        if state is not None and updated_at < time.time() - self.ttl:
+            await self.clear(user_id)
+            return None
+        return state
+
+    async def set(self, user_id, state):
+        now = time.time()
+        await run_db(save_conversation, user_id, state['state'], state.get('desc'), now)
+        self._remember(user_id, dict(state), now)
+
+    async def clear(self, user_id):
+        await run_db(delete_conversation, user_id)
+        self._remember(user_id, None, time.time())
+
+    async def evict_stale(self, context=None):
+        cutoff = time.time() - self.ttl
+        stale = [user_id for user_id, (_, updated_at) in self._cache.items() if updated_at < cutoff]
+        for user_id in stale:
+            del self._cache[user_id]
+        removed = await run_db(delete_stale_conversations, cutoff)
+        if removed:
+            logging.info(f"Expired {removed} abandoned conversations")
@@ -0,0 +1,249 @@
+import os
+from types import MappingProxyType
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from scheduler import REMINDER_INTERVALS
+
+LANGUAGES = ("en", "id")
+DEFAULT_LANGUAGE = os.environ.get("BOT_LANGUAGE", "en").lower()
+if DEFAULT_LANGUAGE not in LANGUAGES:
+    DEFAULT_LANGUAGE = "en"
+
+# Every user-facing string, per language. Entries with {fields} are filled with str.format.
+_TEXTS = {
+    "en": {
+        "welcome": (
+            "🔔 *Reminder Bot* 🔔\n\n"
+            "Welcome! This bot helps you set reminders for your important tasks.\n\n"
+            "⏰ Reminders will be sent: 5d, 3d, 1d, 12h, 6h, 3h, 1h, 30m, exactly at deadline."
+        ),
+        "home": "🔔 *Reminder Bot* 🔔\n\nWhat would you like to do?",
+        "help": (
+            "🔔 *Reminder Bot - Help* 🔔\n\n"
+            "*List of Commands:*\n"
+            "• /start - Start the bot\n"
+            "• /help - Show this guide\n"
+            "• /import - Add many reminders from a CSV/iCalendar file or a list\n"
+            "• /export - Download your reminders as CSV\n"
+            "• /cari - Search your reminders, e.g. /cari statistics\n"
+            "• /timezone - Show or change your time zone\n\n"
+            "Use the buttons below for quick navigation:"
+        ),
+        "input_format": (
+            "🔸 *Reminder Input Format*\n\n"
+            "Format: DD Month HH:MM\n"
+            "Example: 15 April 14:30\n\n"
+            "Month can be written in full or abbreviated."
+        ),
+        "ask_description": "📝 Please enter the reminder description.\n\nExample: Finish math homework\n\nType /cancel to abort.",
+        "ask_deadline": (
+            "📅 *Enter the Deadline*\n\nFormat: DD Month HH:MM\nExample: 15 April 14:30\n"
+            "Also: besok 09:00, in 2 hours, 15 April 2027 14:30\n"
+            "Repeating: every monday 08:00, every day 07:00, every month 15 09:00\n\nType /cancel to abort."
+        ),
+        "saved": "✅ Reminder Saved!",
+        "saved_recurring": "✅ Reminder Saved! 🔁 {rule}",
+        "set_task_error": "Error: {error}\nFormat: <description> DD Month HH:MM\nExample: Statistics 12 March 17:00",
+        "set_task_failed": "Something went wrong. Please verify your input format: <description> DD Month HH:MM",
+        "deadline_error": (
+            "❌ *Error:* {error}\n\nUse format: DD Month HH:MM\nExample: 1 April 17:00\n\nType /cancel to abort."
+        ),
+        "deadline_failed": "Something went wrong. Try again with format DD Month HH:MM",
+        "all_done": "✅ All reminders have been completed!",
+        "cancelled": "❌ Operation cancelled.",
+        "stopped": "❌ All your data has been removed from this bot.",
+        "list_title": "📋 *Your Reminders List*",
+        "list_item": "{number}. *{desc}*\n📅 Deadline: {deadline}",
+        "list_empty": "📭 *No Reminders Found*\n\nYou don't have any saved reminders yet.",
+        "status_done": "✅ Reminder completed.\n\n",
+        "status_deleted": "🗑️ Reminder deleted.\n\n",
+        "marked_done": "✅ *DONE*\n\n{text}",
+        "marked_deleted": "🗑️ *DELETED*\n\nReminder deleted.",
+        "reminder": "🔔 *REMINDER!*\n\n📝 *{desc}*\n⏰ Deadline: {deadline}\n⚠️ {indicator}",
+        "digest_header": "🔔 *REMINDERS!* ({count})",
+        "digest_section": "\n\n📝 *{desc}*\n⏰ Deadline: {deadline}\n⚠️ {indicator}",
+        "deadline_reached": "Deadline reached",
+        "before_deadline": "{interval} before the deadline",
+        "import_prompt": (
+            "📥 Send a .csv (description,deadline,recurrence) or .ics file, or paste one reminder per line:\n\n"
+            "Statistics 12 March 17:00\nMeeting besok 09:00\n\nType /cancel to abort."
+        ),
+        "import_too_many": "❌ Too many reminders: at most {limit} can be imported at once.",
+        "import_too_large": "❌ File too large: at most {limit} KB.",
+        "import_download_failed": "Something went wrong while downloading the file. Please try again.",
+        "imported": "📥 *Reminders imported: {count}*",
+        "import_skipped": "Skipped {count} with a deadline in the past.",
+        "import_errors": "Lines that could not be read: {count}",
+        "import_error_line": "• line {line}: {error}",
+        "export_empty": "📭 You don't have any reminders to export.",
+        "export_caption": "📤 Reminders: {count}",
+        "timezone_current": (
+            "🌍 Your time zone: {zone} (now {now})\n\n"
+            "Change it with /timezone followed by a zone name, e.g. /timezone Asia/Jakarta. WIB, WITA and WIT work too."
+        ),
+        "timezone_set": "✅ Time zone set to {zone} (now {now}).\n\nNew deadlines are read in this zone; existing reminders keep their time.",
+        "timezone_unknown": "❌ Unknown time zone: {zone}\n\nUse a name such as Asia/Jakarta, Europe/London or America/New_York, or WIB, WITA, WIT.",
+        "server_time": "server time",
+        "search_usage": "🔎 Type what to look for after the command, e.g. /cari statistics",
+        "search_title": "🔎 *Results for:* {query}",
+        "search_empty": "🔎 No reminders match: {query}",
+        "rate_limited": "⏳ Too many requests. Please wait a moment and try again.",
+        "reminder_limit": "❌ You already have {limit} reminders, the most allowed. Mark some as done or delete them first.",
+        "import_over_limit": "❌ This would take you past the limit of {limit} reminders: you can add {remaining} more.",
+    },
+    "id": {
+        "welcome": (
+            "🔔 *Reminder Bot* 🔔\n\n"
+            "Selamat datang! Bot ini membantu kamu membuat pengingat untuk tugas-tugas penting.\n\n"
+            "⏰ Pengingat dikirim: 5 hari, 3 hari, 1 hari, 12 jam, 6 jam, 3 jam, 1 jam, 30 menit, dan tepat saat deadline."
+        ),
+        "home": "🔔 *Reminder Bot* 🔔\n\nApa yang ingin kamu lakukan?",
+        "help": (
+            "🔔 *Reminder Bot - Bantuan* 🔔\n\n"
+            "*Daftar Perintah:*\n"
+            "• /start - Mulai bot\n"
+            "• /help - Tampilkan panduan ini\n"
+            "• /import - Tambah banyak pengingat dari file CSV/iCalendar atau daftar\n"
+            "• /export - Unduh pengingat kamu sebagai CSV\n"
+            "• /cari - Cari pengingat, misalnya /cari statistika\n"
+            "• /timezone - Lihat atau ubah zona waktu kamu\n\n"
+            "Gunakan tombol di bawah untuk navigasi cepat:"
+        ),
+        "input_format": (
+            "🔸 *Format Input Pengingat*\n\n"
+            "Format: DD Bulan HH:MM\n"
+            "Contoh: 15 April 14:30\n\n"
+            "Nama bulan boleh ditulis lengkap atau disingkat."
+        ),
+        "ask_description": "📝 Masukkan deskripsi pengingat.\n\nContoh: Kerjakan PR matematika\n\nKetik /cancel untuk membatalkan.",
+        "ask_deadline": (
+            "📅 *Masukkan Deadline*\n\nFormat: DD Bulan HH:MM\nContoh: 15 April 14:30\n"
+            "Bisa juga: besok 09:00, dalam 2 jam, 15 April 2027 14:30\n"
+            "Berulang: setiap senin 08:00, setiap hari 07:00, setiap bulan 15 09:00\n\nKetik /cancel untuk membatalkan."
+        ),
+        "saved": "✅ Pengingat Disimpan!",
+        "saved_recurring": "✅ Pengingat Disimpan! 🔁 {rule}",
+        "set_task_error": "Error: {error}\nFormat: <deskripsi> DD Bulan HH:MM\nContoh: Statistika 12 Maret 17:00",
+        "set_task_failed": "Terjadi kesalahan. Periksa format input: <deskripsi> DD Bulan HH:MM",
+        "deadline_error": (
+            "❌ *Error:* {error}\n\nGunakan format: DD Bulan HH:MM\nContoh: 1 April 17:00\n\nKetik /cancel untuk membatalkan."
+        ),
+        "deadline_failed": "Terjadi kesalahan. Coba lagi dengan format DD Bulan HH:MM",
+        "all_done": "✅ Semua pengingat telah diselesaikan!",
+        "cancelled": "❌ Operasi dibatalkan.",
+        "stopped": "❌ Semua data kamu telah dihapus dari bot ini.",
+        "list_title": "📋 *Daftar Pengingat Kamu*",
+        "list_item": "{number}. *{desc}*\n📅 Deadline: {deadline}",
+        "list_empty": "📭 *Tidak Ada Pengingat*\n\nKamu belum punya pengingat yang tersimpan.",
+        "status_done": "✅ Pengingat selesai.\n\n",
+        "status_deleted": "🗑️ Pengingat dihapus.\n\n",
+        "marked_done": "✅ *SELESAI*\n\n{text}",
+        "marked_deleted": "🗑️ *DIHAPUS*\n\nPengingat dihapus.",
+        "reminder": "🔔 *PENGINGAT!*\n\n📝 *{desc}*\n⏰ Deadline: {deadline}\n⚠️ {indicator}",
+        "digest_header": "🔔 *PENGINGAT!* ({count})",
+        "digest_section": "\n\n📝 *{desc}*\n⏰ Deadline: {deadline}\n⚠️ {indicator}",
+        "deadline_reached": "Deadline tiba",
+        "before_deadline": "{interval} sebelum deadline",
+        "import_prompt": (
+            "📥 Kirim file .csv (description,deadline,recurrence) atau .ics, atau tempel satu pengingat per baris:\n\n"
+            "Statistika 12 Maret 17:00\nRapat besok 09:00\n\nKetik /cancel untuk membatalkan."
+        ),
+        "import_too_many": "❌ Terlalu banyak pengingat: maksimal {limit} sekali impor.",
+        "import_too_large": "❌ File terlalu besar: maksimal {limit} KB.",
+        "import_download_failed": "Terjadi kesalahan saat mengunduh file. Silakan coba lagi.",
+        "imported": "📥 *Pengingat diimpor: {count}*",
+        "import_skipped": "{count} dilewati karena deadline sudah lewat.",
+        "import_errors": "Baris yang tidak terbaca: {count}",
+        "import_error_line": "• baris {line}: {error}",
+        "export_empty": "📭 Kamu tidak punya pengingat untuk diekspor.",
+        "export_caption": "📤 Pengingat: {count}",
+        "timezone_current": (
+            "🌍 Zona waktu kamu: {zone} (sekarang {now})\n\n"
+            "Ubah dengan /timezone diikuti nama zona, misalnya /timezone Asia/Jakarta. WIB, WITA dan WIT juga bisa."
+        ),
+        "timezone_set": "✅ Zona waktu diatur ke {zone} (sekarang {now}).\n\nDeadline baru dibaca dalam zona ini; pengingat yang sudah ada tetap pada waktunya.",
+        "timezone_unknown": "❌ Zona waktu tidak dikenal: {zone}\n\nGunakan nama seperti Asia/Jakarta, Europe/London atau America/New_York, atau WIB, WITA, WIT.",
+        "server_time": "waktu server",
+        "search_usage": "🔎 Ketik kata yang dicari setelah perintah, misalnya /cari statistika",
+        "search_title": "🔎 *Hasil untuk:* {query}",
+        "search_empty": "🔎 Tidak ada pengingat yang cocok: {query}",
+        "rate_limited": "⏳ Terlalu banyak permintaan. Tunggu sebentar lalu coba lagi.",
+        "reminder_limit": "❌ Kamu sudah punya {limit} pengingat, jumlah maksimal. Tandai selesai atau hapus beberapa terlebih dahulu.",
+        "import_over_limit": "❌ Ini melebihi batas {limit} pengingat: kamu hanya bisa menambah {remaining} lagi.",
+    },
+}
+
+_BUTTONS = {
+    "en": {
+        "add": "➕ Add Reminder", "view": "📋 View Reminders", "home": "🏠 Home", "menu": "🏠 Main Menu",
+        "add_new": "➕ Add New Reminder", "add_another": "➕ Add Another Reminder", "view_all": "📋 View All Reminders",
+        "prev": "◀️ Prev", "next": "Next ▶️", "done": "✅ Done {number}", "delete": "🗑️ Delete {number}",
+    },
+    "id": {
+        "add": "➕ Tambah Pengingat", "view": "📋 Lihat Pengingat", "home": "🏠 Beranda", "menu": "🏠 Menu Utama",
+        "add_new": "➕ Tambah Pengingat Baru", "add_another": "➕ Tambah Pengingat Lagi", "view_all": "📋 Lihat Semua Pengingat",
+        "prev": "◀️ Sebelumnya", "next": "Berikutnya ▶️", "done": "✅ Selesai {number}", "delete": "🗑️ Hapus {number}",
+    },
+}
+
+_INTERVAL_NAMES = {
+    "id": {
+        "5 days": "5 hari", "3 days": "3 hari", "1 day": "1 hari", "12 hours": "12 jam", "6 hours": "6 jam",
+        "3 hours": "3 jam", "1 hour": "1 jam", "30 minutes": "30 menit",
+    },
+}
+
+def _button(lang, name, data):
+    return InlineKeyboardButton(_BUTTONS[lang][name], callback_data=data)
+
+def _build_keyboards(lang):
+    add = _button(lang, "add", "add_reminder")
+    view = _button(lang, "view", "list_reminder")
+    menu = _button(lang, "menu", "home")
+    return {
+        "start": InlineKeyboardMarkup(((add,), (view,))),
+        "help": InlineKeyboardMarkup(((add,), (view,), (menu,))),
+        "all_done": InlineKeyboardMarkup(((_button(lang, "add_new", "add_reminder"),), (menu,))),
+        "saved": InlineKeyboardMarkup((
+            (_button(lang, "add_another", "add_reminder"),), (_button(lang, "view_all", "list_reminder"),), (menu,)
+        )),
+        "list_empty": InlineKeyboardMarkup(((add,), (_button(lang, "home", "home"),))),
+    }
+
+def _build_indicators(lang):
+    # The "⚠️ ..." line of a reminder, per interval label
+    names = _INTERVAL_NAMES.get(lang, {})
+    return {
+        label: _TEXTS[lang]["deadline_reached"] if offset == 0
+        else _TEXTS[lang]["before_deadline"].format(interval=names.get(label, label))
+        for offset, label in REMINDER_INTERVALS
+    }
+
+# Built once at import and shared by every update; telegram objects are immutable
+TEXTS = MappingProxyType({lang: MappingProxyType(_TEXTS[lang]) for lang in LANGUAGES})
+KEYBOARDS = MappingProxyType({lang: MappingProxyType(_build_keyboards(lang)) for lang in LANGUAGES})
+INDICATORS = MappingProxyType({lang: MappingProxyType(_build_indicators(lang)) for lang in LANGUAGES})
+# Last row of every reminder list page, and the Done/Delete labels of the first 20 positions
+LIST_FOOTER = MappingProxyType({
+    lang: (_button(lang, "add", "add_reminder"), _button(lang, "home", "home")) for lang in LANGUAGES
+})
+_PAGE_BUTTON_LABELS = MappingProxyType({
+    lang: tuple(
+        (_BUTTONS[lang]["done"].format(number=n), _BUTTONS[lang]["delete"].format(number=n)) for n in range(1, 21)
+    )
+    for lang in LANGUAGES
+})
+
+def language_of(user):
+    """Indonesian for users whose Telegram client is set to it, else BOT_LANGUAGE."""
+    code = getattr(user, "language_code", None) or ""
+    return "id" if code.lower().startswith("id") else DEFAULT_LANGUAGE
+
+def button_label(lang, name):
+    return _BUTTONS[lang][name]
+
+def page_button_labels(lang, number):
+    """The (Done, Delete) labels for the number-th reminder on a list page."""
+    labels = _PAGE_BUTTON_LABELS[lang]
+    if number <= len(labels):
+        return labels[number - 1]
+    return _BUTTONS[lang]["done"].format(number=number), _BUTTONS[lang]["delete"].format(number=number)
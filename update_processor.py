@@ -0,0 +1,55 @@
+import asyncio
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """Processes updates from different users in parallel, but one at a time per user.
+
+    Updates from the same user wait on that user's lock before taking one of the
+    ``max_concurrent_updates`` worker slots, so one busy user cannot occupy every slot.
+    Handlers that read a user's state, await, then write it stay consistent: the add-reminder
+    conversation in the ConversationStore, the MAX_ACTIVE_REMINDERS check before an insert,
+    and Done/Delete re-rendering the list page the user just pressed.
+    The Application may accept up to ``max_pending_updates`` updates before back-pressure.
+    """
+
+    def __init__(self, max_concurrent_updates, max_pending_updates=None):
+        super().__init__(max_pending_updates or max_concurrent_updates * 64)
+        self.workers = max_concurrent_updates
+        self._worker_slots = asyncio.Semaphore(max_concurrent_updates)
+        self._locks = {}  # key: user or chat, value: [lock, updates waiting or running]
+
+    @staticmethod
+    def _key(update):
+        if isinstance(update, Update):
+            if update.effective_user is not None:
+                return update.effective_user.id
+            if update.effective_chat is not None:
+                return ("chat", update.effective_chat.id)
+        return None
+
+    async def do_process_update(self, update, coroutine):
+        key = self._key(update)
+        if key is None:
+            async with self._worker_slots:
+                await coroutine
+            return
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                async with self._worker_slots:
+                    await coroutine
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                # Idle users hold no memory
+                del self._locks[key]
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
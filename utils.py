@@ -1,22 +1,57 @@
-def get_month_number(month_text):
-    month_variants = {
-        "januari": 1, "january": 1, "jan": 1,
-        "februari": 2, "february": 2, "feb": 2, "pebruari": 2,
-        "maret": 3, "march": 3, "mar": 3,
-        "april": 4, "apr": 4,
-        "mei": 5, "may": 5,
-        "juni": 6, "june": 6, "jun": 6,
-        "juli": 7, "july": 7, "jul": 7,
-        "agustus": 8, "august": 8, "aug": 8, "agt": 8,
-        "september": 9, "sept": 9, "sep": 9,
-        "oktober": 10, "october": 10, "okt": 10, "oct": 10,
-        "november": 11, "nopember": 11, "nov": 11,
-        "desember": 12, "december": 12, "des": 12, "dec": 12
-    }
-    month_text = month_text.lower()
-    if month_text in month_variants:
-        return month_variants[month_text]
-    for key in month_variants.keys():
-        if month_text in key or key in month_text:
-            return month_variants[key]
-    raise ValueError(f"Bulan '{month_text}' tidak dikenali")
+import os
+from datetime import datetime
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from deadline_parser import get_month_number
+
+# Zone for users who never ran /timezone; unset means the server's local time
+DEFAULT_TIMEZONE = os.environ.get("BOT_TIMEZONE") or None
+# Indonesian zone abbreviations accepted by /timezone
+TIMEZONE_ALIASES = {"wib": "Asia/Jakarta", "wita": "Asia/Makassar", "wit": "Asia/Jayapura", "utc": "UTC"}
+
+def resolve_timezone(name):
+    """Canonical IANA name for user input such as "Asia/Jakarta", "asia/jakarta" or "WIB".
+
+    Raises ValueError if the zone is unknown.
+    """
+    name = name.strip()
+    name = TIMEZONE_ALIASES.get(name.lower(), name)
+    try:
+        return ZoneInfo(name).key
+    except (ZoneInfoNotFoundError, ValueError):
+        pass
+    # Zone files are case-sensitive on most systems; match the spelling of a known zone
+    from zoneinfo import available_timezones
+    for key in available_timezones():
+        if key.lower() == name.lower():
+            return key
+    raise ValueError(f"Unknown time zone {name!r}")
+
+@lru_cache(maxsize=None)
+def get_zone(name=None):
+    """The tzinfo for a stored zone name; None (server local time) when neither it nor BOT_TIMEZONE is set."""
+    name = name or DEFAULT_TIMEZONE
+    if name is None:
+        return None
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+def legacy_deadline_to_timestamp(deadline_str, now=None):
+    # Parses the old "15-April 14:30" format, assuming the next occurrence of that date
+    now = now or datetime.now()
+    day_part, month_time = deadline_str.split('-', 1)
+    month_name, time_str = month_time.split(' ', 1)
+    month = get_month_number(month_name)
+    day = int(day_part)
+    hour, minute = map(int, time_str.split(':'))
+    deadline = datetime(now.year, month, day, hour, minute)
+    if deadline < now:
+        deadline = datetime(now.year + 1, month, day, hour, minute)
+    return int(deadline.timestamp())
+
+def format_deadline(deadline_ts, tz=None):
+    if deadline_ts is None:
+        return "-"
+    return datetime.fromtimestamp(deadline_ts, tz).strftime("%d-%B %Y %H:%M")